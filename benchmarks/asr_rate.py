@@ -0,0 +1,64 @@
+"""
+Compares the cost of recognizing 48 kHz input against 16 kHz input: preparation of a 10 s phrase (downmixing and
+resampling) and CPU time of ``KaldiRecognizer`` per second of speech.
+
+The recognizer part requires a Vosk model: ``python benchmarks/asr_rate.py [model path]``,
+by default the model is looked up by language ('ru').
+"""
+import sys
+import time
+
+import numpy as np
+from av import AudioFrame
+
+from hubsbot.consumer.processed.audio import frames_to_pcm16
+
+
+def make_frames(seconds: float) -> list:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(48000 * seconds)) / 48000
+    # a crude voiced signal: harmonics of a gliding pitch with noise
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / 48000
+    signal = sum(np.sin(k * phase) / k for k in range(1, 10)) * 3000 + rng.normal(0, 200, len(t))
+    samples = np.repeat(signal.astype(np.int16), 2)
+    frames = []
+    for i in range(0, len(samples), 1920):
+        frame = AudioFrame.from_ndarray(samples[None, i:i + 1920], format='s16', layout='stereo')
+        frame.sample_rate = 48000
+        frames.append(frame)
+    return frames
+
+
+def recognizer_time(model, pcm: np.ndarray, rate: int) -> float:
+    from vosk import KaldiRecognizer
+    rec = KaldiRecognizer(model, rate)
+    start = time.process_time()
+    for chunk in np.array_split(pcm, max(1, len(pcm) // (rate // 5))):
+        rec.AcceptWaveform(chunk.tobytes())
+    rec.FinalResult()
+    return time.process_time() - start
+
+
+def main(seconds: float = 10):
+    frames = make_frames(seconds)
+    pcms = {}
+    for rate in (48000, 16000):
+        start = time.perf_counter()
+        for _ in range(10):
+            pcms[rate] = frames_to_pcm16(frames, rate, pad=0.2)
+        print(f'{rate // 1000} kHz preparation: {(time.perf_counter() - start) / 10 * 1e3:7.2f} ms per {seconds:.0f} s phrase')
+
+    try:
+        from vosk import Model
+        model = Model(model_path=sys.argv[1]) if len(sys.argv) > 1 else Model(lang='ru')
+    except Exception as err:
+        print(f'No Vosk model, skipping the recognizer: {err}')
+        return
+    for rate, pcm in pcms.items():
+        cpu = recognizer_time(model, pcm, rate)
+        print(f'{rate // 1000} kHz recognizer: {cpu / seconds * 1e3:7.1f} ms CPU per second of speech')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures the decoding cost of inbound Hubs frames (presence, naf and nafr) per message:
+the former path (parse, re-serialize, parse again, parse nested naf) against the single-parse one for every codec.
+"""
+import json
+import timeit
+
+from hubsbot.hubsclient.avatar import Avatar
+from hubsbot.hubsclient.client import MSG
+from hubsbot.hubsclient.codec import codecs, set_codec
+
+
+def make_frames() -> dict:
+    avatar = Avatar(owner_id='abcdef0')
+    naf = avatar.to_obj()
+    metas = {'metas': [{'profile': {'displayName': 'Peer', 'avatarId': 'basebot'}, 'presence': 'room',
+                        'roles': {'owner': False}, 'permissions': {'voice_chat': True}}]}
+    presence = [None, None, 'hub:room', 'presence_state', {f'peer{i:03}': metas for i in range(20)}]
+    um = {'dataType': 'um', 'data': {'d': [{**naf, 'components': {'0': naf['components'][0], '5': naf['components'][5]}}]}}
+    return {
+        'presence': json.dumps(presence),
+        'naf': json.dumps([None, None, 'hub:room', 'naf', {'from_session_id': 'abcdef0', 'dataType': 'u', 'data': naf}]),
+        'nafr': json.dumps([None, None, 'hub:room', 'nafr', {'from_session_id': 'abcdef0', 'naf': json.dumps(um)}]),
+    }
+
+
+def decode_former(frame: str):
+    msg = json.loads(MSG(*json.loads(frame)).to_json())
+    if msg[3] == 'nafr':
+        json.loads(msg[4]['naf'])
+
+
+def decode(frame: str):
+    msg = MSG.from_json(frame)
+    if msg.cmd == 'nafr':
+        msg.naf
+
+
+def main(number: int = 20000):
+    frames = make_frames()
+    set_codec('json')
+    for kind, frame in frames.items():
+        t = timeit.timeit(lambda: decode_former(frame), number=number) / number
+        print(f'{kind:>8} former     {t * 1e6:8.2f} us/msg')
+        for name in codecs:
+            set_codec(name)
+            t = timeit.timeit(lambda: decode(frame), number=number) / number
+            print(f'{kind:>8} {name:<10} {t * 1e6:8.2f} us/msg')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Measures frames per second of ``EnergyMeter`` against the former ``SlidingAverage`` for 50 simultaneous speakers
+sending 20 ms stereo frames at 48 kHz, as they are decoded from the Hubs opus streams.
+"""
+import time
+from typing import List
+
+import numpy as np
+from av import AudioFrame
+
+from hubsbot.consumer.processed.vad import EnergyMeter, get_frame_time
+
+
+class FormerSlidingAverage:
+    frames: List[np.ndarray] = []
+    lengths: List[float] = []
+    length: float = 0
+
+    def __init__(self, length):
+        self.length = length
+
+    def add_frame(self, frame: AudioFrame):
+        self.lengths.append(get_frame_time(frame))
+        self.frames.append(frame.to_ndarray())
+        if sum(self.lengths) > self.length:
+            self.frames.pop(0)
+            self.lengths.pop(0)
+
+    def calc(self):
+        return np.abs(np.concatenate(self.frames, axis=1)).mean()
+
+
+def make_frames(n: int) -> List[AudioFrame]:
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(n):
+        samples = rng.integers(-3000, 3000, size=(1, 960 * 2), dtype=np.int16)
+        frame = AudioFrame.from_ndarray(samples, format='s16', layout='stereo')
+        frame.sample_rate = 48000
+        frames.append(frame)
+    return frames
+
+
+def run(meters: list, frames: List[AudioFrame], rounds: int) -> float:
+    start = time.perf_counter()
+    for i in range(rounds):
+        frame = frames[i % len(frames)]
+        for meter in meters:
+            meter.add_frame(frame)
+            meter.calc()
+    return rounds * len(meters) / (time.perf_counter() - start)
+
+
+def main(speakers: int = 50, rounds: int = 500):
+    frames = make_frames(100)
+    # the former lists are shared by all instances, so the window effectively spans all speakers
+    print(f'former SlidingAverage: {run([FormerSlidingAverage(0.5) for _ in range(speakers)], frames, rounds):10.0f} frames/s')
+    print(f'EnergyMeter:           {run([EnergyMeter(0.5) for _ in range(speakers)], frames, rounds):10.0f} frames/s')
+
+
+if __name__ == '__main__':
+    main()
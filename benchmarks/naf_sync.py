@@ -0,0 +1,76 @@
+"""
+Measures syncs per second of an animating avatar: the former path (components rebuilt with ``to_obj`` and serialized
+through the ``default=`` hook) against ``HubsClient.sync`` with the cached components.
+"""
+import asyncio
+import json
+import time
+
+from hubsbot.hubsclient.client import HubsClient
+from hubsbot.hubsclient.utils import Vector3, Rotation
+
+
+class NullSocket:
+    async def send(self, data):
+        pass
+
+
+def former_components(avatar) -> list:
+    return [
+        avatar.position.to_obj(),
+        avatar.rotation.to_obj(),
+        avatar.scale.to_obj(),
+        {
+            "avatarSrc": avatar.avatar_url,
+            "avatarType": avatar.avatar_type.value,
+            "muted": avatar.muted,
+            "isSharingAvatarCamera": avatar.sharing_avatar_camera,
+        },
+        {"left_hand_pose": avatar.lefthand.pose.value, "right_hand_pose": avatar.righthand.pose.value},
+        avatar.head_transform.position.to_obj(),
+        avatar.head_transform.rotation.to_obj(),
+        avatar.lefthand.position.to_obj(),
+        avatar.lefthand.rotation.to_obj(),
+        avatar.lefthand.visible,
+        avatar.righthand.position.to_obj(),
+        avatar.righthand.rotation.to_obj(),
+        avatar.righthand.visible,
+    ]
+
+
+def animate(avatar, i: int):
+    avatar.position = Vector3(0.01 * i, 0, -0.01 * i)
+    avatar.head_transform.rotation = Rotation(0, i % 360, 0)
+
+
+async def main(n: int = 20000):
+    client = HubsClient('localhost', 'room', 'basebot')
+    client.sock = NullSocket()
+    client.avatar.owner_id = 'bot'
+    avatar = client.avatar
+
+    start = time.perf_counter()
+    for i in range(n):
+        animate(avatar, i)
+        data = avatar._header()
+        data['components'] = former_components(avatar)
+        data['isFirstSync'] = False
+        json.dumps(['8', str(i), 'hub:room', 'naf', {'dataType': 'u', 'data': data}], default=lambda o: o.to_obj())
+    print(f'former full naf:    {n / (time.perf_counter() - start):10.0f} syncs/s')
+
+    start = time.perf_counter()
+    for i in range(n):
+        animate(avatar, i)
+        avatar.is_first_sync = True
+        await client.sync()
+    print(f'cached full naf:    {n / (time.perf_counter() - start):10.0f} syncs/s')
+
+    start = time.perf_counter()
+    for i in range(n):
+        animate(avatar, i)
+        await client.sync()
+    print(f'cached delta nafr:  {n / (time.perf_counter() - start):10.0f} syncs/s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
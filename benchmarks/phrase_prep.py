@@ -0,0 +1,58 @@
+"""
+Measures preparation time of 5 s and 30 s phrases (20 ms stereo frames at 48 kHz) for the recognizer:
+the former pydub concatenation against ``frames_to_pcm16``. The former implementation requires ``pydub``.
+"""
+import io
+import time
+from typing import List
+
+import numpy as np
+from av import AudioFrame
+from pydub import AudioSegment
+
+from hubsbot.consumer.processed.audio import frames_to_pcm16
+
+
+def former_prepare(frames: List[AudioFrame], framerate: int = 48000) -> bytes:
+    segment = AudioSegment.empty()
+    for frame in frames:
+        raw = frame.to_ndarray().tobytes()
+        s = io.BytesIO(raw)
+        segment = segment + AudioSegment.from_raw(s, sample_width=frame.format.bytes,
+                                                  channels=len(frame.layout.channels), frame_rate=frame.sample_rate)
+
+    silence = AudioSegment.silent(2000, framerate)
+    segment = silence + segment + silence
+    segment = segment.set_frame_rate(framerate)
+    segment = segment.set_channels(1)
+    return segment.raw_data
+
+
+def make_frames(seconds: float) -> List[AudioFrame]:
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(int(seconds / 0.02)):
+        samples = rng.integers(-3000, 3000, size=(1, 960 * 2), dtype=np.int16)
+        frame = AudioFrame.from_ndarray(samples, format='s16', layout='stereo')
+        frame.sample_rate = 48000
+        frames.append(frame)
+    return frames
+
+
+def measure(f, frames, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        f(frames)
+    return (time.perf_counter() - start) / number
+
+
+def main():
+    for seconds, number in ((5, 5), (30, 1)):
+        frames = make_frames(seconds)
+        former = measure(former_prepare, frames, number)
+        current = measure(lambda fs: frames_to_pcm16(fs, 48000, pad=2).tobytes(), frames, number * 20)
+        print(f'{seconds:>2} s phrase: former {former * 1e3:9.2f} ms, frames_to_pcm16 {current * 1e3:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares NAF pose updates per second of ``Peer.update_from_naf`` against the former decompose/compose implementation
+on a synthetic stream of 200 peers.
+"""
+import random
+import time
+
+import numpy as np
+from transforms3d.affines import decompose44, compose
+
+from hubsbot.peer import PeerRegistry
+
+
+def update_former(matrix: np.ndarray, components: dict, keys=('0', '1', '2')):
+    k1, k2, k3 = keys
+    T, R, Z, S = decompose44(matrix)
+    if k1 in components and components[k1] is not None:
+        position = components[k1]
+        T = np.array([position['x'], position['y'], position['z']])
+    if k3 in components and components[k3] is not None:
+        scale = components[k3]
+        Z = np.array([scale['x'], scale['y'], scale['z']])
+    return compose(T, R, Z, S)
+
+
+def make_stream(n_peers: int, n_updates: int) -> list:
+    def vec():
+        return {'x': random.uniform(-10, 10), 'y': random.uniform(0, 2), 'z': random.uniform(-10, 10)}
+
+    def rot():
+        return {'x': random.uniform(-30, 30), 'y': random.uniform(-180, 180), 'z': 0}
+
+    return [
+        (f'peer{random.randrange(n_peers)}', {'components': {'0': vec(), '1': rot(), '5': vec(), '6': rot()}})
+        for _ in range(n_updates)
+    ]
+
+
+def main(n_peers: int = 200, n_updates: int = 50000):
+    stream = make_stream(n_peers, n_updates)
+    peers = PeerRegistry()
+    for i in range(n_peers):
+        peers.add(f'peer{i}', f'Peer {i}')
+
+    matrices = {id: (np.eye(4), np.eye(4)) for id in peers}
+    start = time.perf_counter()
+    for id, data in stream:
+        matrix, head_matrix = matrices[id]
+        matrices[id] = (update_former(matrix, data['components'], ('0', '1', '2')),
+                        update_former(head_matrix, data['components'], ('5', '6', '9999')))
+    former = n_updates / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for id, data in stream:
+        peers[id].update_from_naf(data)
+    current = n_updates / (time.perf_counter() - start)
+
+    print(f'former (decompose/compose, no rotation): {former:10.0f} updates/s')
+    print(f'current (direct, with rotation):         {current:10.0f} updates/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares passing samples to a worker process through the pipe (pickled bytes) against the shared memory ring buffer
+(only ``RingRef`` is pickled). The worker reads all samples of a chunk and replies, as the recognizer does.
+Reports throughput and mean round-trip latency for 0.2 s stream chunks and 15 s phrases of 48 kHz mono int16.
+"""
+import time
+from multiprocessing import Pipe, Process
+
+import numpy as np
+
+from hubsbot.consumer.processed.ring import RingReader, RingRef, SharedRingBuffer
+
+
+def worker(conn):
+    reader = RingReader()
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            reader.close()
+            break
+        if isinstance(msg, RingRef):
+            with reader.view(msg) as view:
+                total = int(np.frombuffer(view, dtype=np.int16).sum())
+        else:
+            total = int(np.frombuffer(msg, dtype=np.int16).sum())
+        conn.send(total)
+
+
+def run(conn, chunk: bytes, number: int, ring: SharedRingBuffer | None) -> tuple:
+    start = time.perf_counter()
+    for _ in range(number):
+        if ring is None:
+            conn.send(chunk)
+            conn.recv()
+        else:
+            ref = ring.write(chunk)
+            conn.send(ref)
+            conn.recv()
+            ring.release(ref)
+    elapsed = time.perf_counter() - start
+    return len(chunk) * number / elapsed / 2 ** 20, elapsed / number
+
+
+def main():
+    conn, child = Pipe()
+    ring = SharedRingBuffer(4 * 2 ** 20)
+    process = Process(target=worker, args=(child,), daemon=True)
+    process.start()
+
+    for name, seconds, number in (('0.2 s chunk', 0.2, 5000), ('15 s phrase', 15, 200)):
+        chunk = np.random.default_rng(0).integers(-3000, 3000, int(48000 * seconds), dtype=np.int16).tobytes()
+        for transport, r in (('pipe', None), ('ring', ring)):
+            throughput, latency = run(conn, chunk, number, r)
+            print(f'{name}, {transport}: {throughput:8.1f} MiB/s, {latency * 1e3:7.3f} ms per chunk')
+
+    conn.send(None)
+    process.join()
+    ring.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures attribute set/get and index access cost of ``Vector3`` and ``Avatar`` against the former
+``typed_dataclass``/``indexable`` implementation (coercion on every assignment, wrapper subclasses).
+"""
+import timeit
+from dataclasses import KW_ONLY, Field, dataclass, field
+from functools import wraps
+
+from hubsbot.hubsclient.avatar import Avatar
+from hubsbot.hubsclient.utils import Vector3
+
+
+def former_typed_dataclass(cls):
+    cls = dataclass(cls)
+
+    @wraps(cls, updated=())
+    class _wrap(cls):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            for f in cls.__dataclass_fields__.values():
+                if not hasattr(self.__class__, f.name):
+                    if not isinstance(getattr(self, f.name), f.type) and not isinstance(getattr(self, f.name), Field):
+                        self.__setattr__(f.name, getattr(self, f.name))
+
+        def __setattr__(self, name, val):
+            if name in cls.__dataclass_fields__:
+                typ = cls.__dataclass_fields__[name].type
+                if not isinstance(val, typ):
+                    if isinstance(val, dict):
+                        val = typ(**val)
+                    elif isinstance(val, list) or isinstance(val, tuple):
+                        val = typ(*val)
+                    else:
+                        val = typ(val)
+            super().__setattr__(name, val)
+
+    return _wrap
+
+
+def former_indexable(cls):
+    if not hasattr(cls, "__slots__"):
+        cls.__slots__ = tuple(cls.__dataclass_fields__.keys())
+
+    @wraps(cls, updated=())
+    class _wrap(cls):
+        def __getitem__(self, ix):
+            if isinstance(ix, int):
+                return self.__getattribute__(list(self.__slots__)[ix])
+            return self.__getattribute__(ix)
+
+    return _wrap
+
+
+@former_indexable
+@former_typed_dataclass
+class FormerVector3:
+    x: float = 0
+    y: float = 0
+    z: float = 0
+    _: KW_ONLY
+    isVector3: bool = True
+
+
+@former_typed_dataclass
+class FormerTransform:
+    position: FormerVector3 = field(default_factory=FormerVector3)
+    muted: bool = True
+
+
+def report(name: str, stmt, number: int = 200000):
+    t = timeit.timeit(stmt, number=number) / number
+    print(f'{name:<28} {t * 1e9:8.1f} ns')
+
+
+def main():
+    fv, v = FormerVector3(1, 2, 3), Vector3(1, 2, 3)
+    ft, avatar = FormerTransform(), Avatar()
+
+    report('former Vector3 set x', lambda: setattr(fv, 'x', 1.5))
+    report('current Vector3 set x', lambda: setattr(v, 'x', 1.5))
+    report('former Vector3 get x', lambda: fv.x)
+    report('current Vector3 get x', lambda: v.x)
+    report('former Vector3 [1]', lambda: fv[1])
+    report('current Vector3 [1]', lambda: v[1])
+    report('former Vector3()', lambda: FormerVector3(1.0, 2.0, 3.0))
+    report('current Vector3()', lambda: Vector3(1.0, 2.0, 3.0))
+    report('former set position', lambda: setattr(ft, 'position', fv))
+    report('current set position', lambda: setattr(avatar, 'position', v))
+    report('former set muted', lambda: setattr(ft, 'muted', False))
+    report('current set muted', lambda: setattr(avatar, 'muted', False))
+
+
+if __name__ == '__main__':
+    main()
@@ -12,7 +12,7 @@ from hubsbot.consumer import Message, TextConsumer as BaseTextConsumer
 from hubsbot.consumer.abstract.factory import ConsumerFactory as BaseConsumerFactory
 from hubsbot.consumer.processed.openai import GptConsumer
 from hubsbot.consumer.processed.vosk import VoskVoiceConsumer
-from hubsbot.hubsclient.utils import Rotation, Vector3
+from hubsbot.hubsclient.utils import Rotation
 from hubsbot.peer import Peer
 
 
@@ -35,8 +35,9 @@ class AnimatedBot(Bot):
 
     async def _animate(self, animation: Animation):
         async def animate_to_node(self, node: Animation.Node):
-            pos = np.asarray(self.hubs_client.avatar.position)[:-1]
-            initial_pos = pos
+            # a view of the avatar position, so changing it moves the avatar
+            pos = np.asarray(self.hubs_client.avatar.position)
+            initial_pos = pos.copy()
             dist = np.linalg.norm(pos - node.pos, 2)
             k = 0.01
 
@@ -57,7 +58,6 @@ class AnimatedBot(Bot):
 
             while dist > node.r:
                 pos += speed * direction
-                self.hubs_client.avatar.position = Vector3(x=pos[0], y=pos[1], z=pos[2])
                 dist = np.linalg.norm(pos - node.pos, 2)
                 await self.hubs_client.sync()
                 await asyncio.sleep(k)
@@ -97,11 +97,7 @@ class ConferenceBot(AnimatedBot):
         # print(self.hubs_client.sid)
         # print(list(map(lambda p: p.id, self.peers.values())))
 
-        other_peers_centroid = \
-            np.mean(list(map( lambda p: p.matrix[:3, -1],
-                filter(
-                    lambda p: p.id != self.hubs_client.sid,
-                    self.peers.values() ) )), axis=0)
+        other_peers_centroid = self.peers.centroid(exclude=(self.hubs_client.sid,))
 
         if len(self.peers.items()) == 2:
             # select the table closest to user
@@ -1,27 +1,26 @@
 import asyncio
 import json
-from random import random
-from typing import Dict, List, Tuple
+import time
+from typing import Awaitable, Callable, Dict, List, Set
 from urllib.parse import urlparse # for ``from_sharing_link``
 
-import numpy as np
 from aiortc.mediastreams import VideoStreamTrack, MediaStreamTrack
 import websockets
+from websockets.exceptions import ConnectionClosed
 import logging
 from pymediasoup import Device, AiortcHandler
-from pymediasoup.consumer import Consumer
-from pymediasoup.data_consumer import DataConsumer
 from pymediasoup.producer import Producer
 from pymediasoup.sctp_parameters import SctpStreamParameters
 from pymediasoup.transport import Transport
 
 from hubsbot.hubsclient import HubsClient
-from hubsbot.consumer import ConsumerFactory, VoiceConsumer, TextConsumer, Message
-from hubsbot.peer import Peer
-
-
-def generateRandomNumber() -> int:
-    return round(random()*10000000)
+from hubsbot.hubsclient.client import MSG
+from hubsbot.hubsclient.utils import Backoff
+from hubsbot.consumer import ConsumerFactory, TextConsumer, Message
+from hubsbot.peer import Peer, PeerRegistry
+from .dispatcher import EventDispatcher
+from .protoo import ProtooClient
+from .consumers import ConsumerEntry, ConsumerRegistry
 
 
 class Bot:
@@ -54,12 +53,11 @@ class Bot:
         self.audio_track = voice_track
         self.media_device = Device(handlerFactory=AiortcHandler.createFactory(tracks=[self.video_track, self.audio_track]))
 
-        self.pending_mediasoup_requests: Dict[int, asyncio.Future] = {}
-
         # Filled in ``join``
         self.voice_host = None
         self.voice_token = None
         self.voice_socket = None
+        self.protoo: ProtooClient | None = None
         self.voice_peer_id = None
         self.recv_transport: Transport | None = None
         self.send_transport: Transport | None = None
@@ -69,11 +67,26 @@ class Bot:
         self.video_producer: Producer | None = None
 
         # Filled in ``_on_mediasoup_new_consumer``
-        self.consumers: List[Tuple[VoiceConsumer | None, Consumer | DataConsumer]] = []
+        self.consumers = ConsumerRegistry()
         self.text_consumers: Dict[str, TextConsumer] = {}
+        # pymediasoup does not support concurrent consume calls on a transport
+        self._consume_lock = asyncio.Lock()
+        self._setup_tasks: Set[asyncio.Task] = set()
+        self.consumer_setup_failures = 0
+
+        self.data_producer: Producer | None = None
 
         # Filled in ``_hubs_receive``
-        self.peers: Dict[str, Peer] = {}
+        self.peers = PeerRegistry()
+        self.hubs_dispatcher = EventDispatcher()
+        self._register_hubs_handlers()
+
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self.hubs_reconnects = 0
+        self.media_reconnects = 0
+        # Duration of every phase of the last join, seconds
+        self.join_timings: Dict[str, float] = {}
 
     @classmethod
     def from_sharing_url(cls,
@@ -95,30 +108,54 @@ class Bot:
         return cls(p.netloc, p.path.split('/')[2], avatar_id, display_name, consumer_factory, voice_track)
 
     async def close(self):
-        await self.hubs_client.close()
-        for voice_consumer, consumer in self.consumers:
-            if voice_consumer is not None:
-                await voice_consumer.stop()
-            await consumer.close()
-
-        await self.audio_producer.close()
-        await self.video_producer.close()
-        await self.data_producer.close()
-
-        for task in self.pending_mediasoup_requests.values():
+        self._closing = True
+        for task in self._tasks:
             task.cancel()
-
-        await self.recv_transport.close()
-        await self.send_transport.close()
+        await self.hubs_client.close()
+        await self._close_media()
 
     async def join(self):
         """
         Joins the room specified on construction
         """
+        self.join_timings.clear()
+        start = time.perf_counter()
+
         # join Hubs room and get token for the corresponding voice room
-        await self.hubs_client.join()
-        t1 = asyncio.create_task(self._hubs_receive())
+        await self._timed('hubs_join', self.hubs_client.join())
+        t1 = self._create_task(self._hubs_receive())
+
+        await self._join_media()
+
+        self.join_timings['total'] = time.perf_counter() - start
+        logging.info('Joined in ' + ', '.join(f'{k}: {v:.3f}s' for k, v in self.join_timings.items()))
+        t2 = self._create_task(self._send_naf())
+
+        return await asyncio.gather(t1, t2)
+
+    def _create_task(self, coro) -> asyncio.Task:
+        """
+        Creates a task, which is cancelled on :meth:`close`.
+        """
+        self._tasks = [t for t in self._tasks if not t.done()]
+        task = asyncio.create_task(coro)
+        self._tasks.append(task)
+        return task
 
+    async def _timed(self, phase: str, aw):
+        """
+        Awaits ``aw`` and records its duration in :attr:`join_timings`.
+        """
+        start = time.perf_counter()
+        try:
+            return await aw
+        finally:
+            self.join_timings[phase] = time.perf_counter() - start
+
+    async def _join_media(self):
+        """
+        Connects to the mediasoup server of the room and starts producing.
+        """
         # perms_token is a token for the mediasoup client
         self.voice_token = self.hubs_client.sessinfo['perms_token']
 
@@ -128,185 +165,247 @@ class Bot:
         # voice peer id corresponding to the Hubs peer id
         self.voice_peer_id = self.hubs_client.sid
 
-        self.voice_socket = await websockets.connect(f'wss://{self.voice_host}/?roomId={self.room_id}&peerId={self.voice_peer_id}', subprotocols=['protoo'], max_queue=2**10)
-        t2 = asyncio.create_task(self._mediasoup_receive())
-        await self._load_mediasoup()
-        self.recv_transport = await self._create_mediasoup_recv_transport()
-        self.send_transport = await self._create_mediasoup_send_transport()
-        await self._start_mediasoup_producing()
+        if self.media_device.loaded:
+            # a device can be loaded only once
+            self.media_device = Device(handlerFactory=AiortcHandler.createFactory(tracks=[self.video_track, self.audio_track]))
 
-        t3 = asyncio.create_task(self._send_naf())
+        self.voice_socket = await self._timed('media_connect', websockets.connect(
+            f'wss://{self.voice_host}/?roomId={self.room_id}&peerId={self.voice_peer_id}',
+            subprotocols=['protoo'], max_queue=2**10))
+        self.protoo = ProtooClient(self.voice_socket)
+        self._create_task(self._mediasoup_receive(self.protoo))
+        await self._timed('load_device', self._load_mediasoup())
 
-        return await asyncio.gather(t1, t2, t3)
+        # transports depend only on the loaded device, so they are created concurrently
+        self.recv_transport, self.send_transport = await self._timed('transports', asyncio.gather(
+            self._create_mediasoup_recv_transport(),
+            self._create_mediasoup_send_transport()
+        ))
 
-    async def _hubs_receive(self):
+        # the server consumes the existing producers on join, so the recv transport has to exist by then
+        await self._timed('media_join', self._join_mediasoup_room())
+        await self._timed('produce', self._start_mediasoup_producing())
+
+    async def _close_media(self):
         """
-        Reads everything from hubsclient and updates ``peers`` dict.
+        Closes the mediasoup connection along with all producers, consumers and transports.
         """
-        def peer_from_metas(id, metas) -> Peer:
-            return Peer(id=id, display_name=metas[0]['profile']['displayName'], matrix=np.ones((4, 4)), head_matrix=np.ones((4, 4)))
+        for task in self._setup_tasks:
+            task.cancel()
+        self._setup_tasks.clear()
 
-        def presence_diff(data: dict):
-            # Don't call me insane. They _really_ send presence_diff with similar keys in 'leaves' and 'joins'
-            for k in data['leaves'].keys():
-                if k not in data['joins']:
-                    self.peers.pop(k)
+        await self._close_consumers(self.consumers.clear())
 
-            for k, v in data['joins'].items():
-                if k not in data['leaves']:
-                    self.peers[k] = peer_from_metas(k, v['metas'])
-                
-            self.hubs_client.avatar.is_first_sync = True
+        for producer in (self.audio_producer, self.video_producer, self.data_producer):
+            if producer is not None:
+                await producer.close()
+        self.audio_producer = self.video_producer = self.data_producer = None
 
-        def presense_state(data: dict):
-            for k, v in data.items():
-                self.peers[k] = peer_from_metas(k, v['metas'])
-            self.hubs_client.avatar.is_first_sync = True
+        if self.protoo is not None:
+            self.protoo.close()
+            self.protoo = None
 
-        def naf(data: dict):
-            k = data['from_session_id']
-            self.peers[k].update_from_naf(data['data'])
+        for transport in (self.recv_transport, self.send_transport):
+            if transport is not None:
+                await transport.close()
+        self.recv_transport = self.send_transport = None
 
-        def nafr_um(data: dict):
-            k = data['from_session_id']
-            self.peers[k].update_from_nafr_um(data['data'])
+        if self.voice_socket is not None:
+            await self.voice_socket.close()
+            self.voice_socket = None
 
-        async def message(data: dict):
-            body = data['body']
-            sid = data['session_id']
-            if sid != self.hubs_client.sid and sid in self.text_consumers.keys():
-                await self.text_consumers[sid].on_message(Message(body=body))
+    async def _close_consumers(self, entries: List[ConsumerEntry]):
+        """
+        Stops the voice consumers and closes the mediasoup consumers.
+        """
+        for entry in entries:
+            try:
+                if entry.voice_consumer is not None:
+                    await entry.voice_consumer.stop()
+                await entry.consumer.close()
+            except Exception as err:
+                logging.error(f'Caught exception while closing a consumer: {err}')
 
-        while True:
-            await asyncio.sleep(0.1)
-            msg = await self.hubs_client.get_message()
-            msg = json.loads(msg.to_json())
-            if msg[3] == 'presence_diff':
-                presence_diff(msg[4])
-            elif msg[3] == 'presence_state':
-                presense_state(msg[4])
-            elif msg[3] == 'naf':
-                naf(msg[4])
-            elif msg[3] == 'nafr':
-                naf_str = msg[4]['naf']
-                naf_json = json.loads(naf_str)
-                naf_json['from_session_id'] = msg[4]['from_session_id']
-                if naf_json['dataType'] == 'um':
-                    nafr_um(naf_json)
-            elif msg[3] == 'message':
-                await message(msg[4])
+    def _remove_peer(self, peer_id: str):
+        """
+        Forgets the peer which left the room and tears down its consumers.
+        """
+        self.peers.pop(peer_id, None)
+        self.text_consumers.pop(peer_id, None)
+        entries = self.consumers.pop_peer(peer_id)
+        if len(entries) > 0:
+            self._create_task(self._close_consumers(entries))
+
+    async def _reconnect_hubs(self):
+        """
+        Reconnects to Hubs after the socket is closed.
+        The mediasoup session is kept as is: Hubs gives a new session id on every join, but the mediasoup peer id
+        stays valid. Peers and their consumers are resynced from the fresh presence_state.
+        """
+        backoff = Backoff()
+        while not self._closing:
+            await backoff.wait()
+            try:
+                await self.hubs_client.reconnect()
+            except Exception as err:
+                logging.error(f'Failed to reconnect to Hubs: {err}')
+                continue
+            self.hubs_reconnects += 1
+            break
+
+    async def _reconnect_media(self):
+        """
+        Closes the current media connection and joins the mediasoup room again.
+        """
+        await self._close_media()
+        backoff = Backoff()
+        while not self._closing:
+            try:
+                await self._join_media()
+                break
+            except Exception as err:
+                logging.error(f'Failed to reconnect to mediasoup: {err}')
+                await self._close_media()
+                await backoff.wait()
+        self.media_reconnects += 1
+
+    def on_hubs_event(self, event: str, handler: Callable):
+        """
+        Registers an additional handler of the Hubs event.
+
+        :param event: Event name, e.g. 'message' or 'naf'
+        :param handler: Function or coroutine function accepting the :class:`MSG` of the event
+        """
+        self.hubs_dispatcher.register(event, handler)
+
+    def _register_hubs_handlers(self):
+        self.hubs_dispatcher.register('presence_diff', self._on_presence_diff)
+        self.hubs_dispatcher.register('presence_state', self._on_presence_state)
+        self.hubs_dispatcher.register('naf', self._on_naf)
+        self.hubs_dispatcher.register('nafr', self._on_nafr)
+        self.hubs_dispatcher.register('message', self._on_message)
+
+    async def _hubs_receive(self):
+        """
+        Reads everything from hubsclient and dispatches it to the registered handlers.
+        All frames available at the moment of a wake-up are handled as a single batch.
+        """
+        while not self._closing:
+            try:
+                msgs = await self.hubs_client.get_messages()
+            except ConnectionClosed as err:
+                if self._closing:
+                    break
+                logging.warning(f'Hubs connection closed: {err}')
+                await self._reconnect_hubs()
+                continue
+            backlog = self.hubs_client.pending_messages
+            await self.hubs_dispatcher.dispatch_batch(((msg.cmd, msg) for msg in msgs), backlog)
+
+    def _peer_from_metas(self, id, metas) -> Peer:
+        return self.peers.add(id, metas[0]['profile']['displayName'])
+
+    def _on_presence_diff(self, msg: MSG):
+        data = msg.data
+        # Don't call me insane. They _really_ send presence_diff with similar keys in 'leaves' and 'joins'
+        for k in data['leaves'].keys():
+            if k not in data['joins']:
+                self._remove_peer(k)
+
+        for k, v in data['joins'].items():
+            if k not in data['leaves']:
+                self._peer_from_metas(k, v['metas'])
+
+        self.hubs_client.avatar.is_first_sync = True
+
+    def _on_presence_state(self, msg: MSG):
+        # presence_state is the full state, which is received after (re)joining
+        for k in set(self.peers.keys()) | set(self.consumers.peers()):
+            if k is not None and k not in msg.data:
+                self._remove_peer(k)
+        for k, v in msg.data.items():
+            self._peer_from_metas(k, v['metas'])
+        self.hubs_client.avatar.is_first_sync = True
+
+    def _on_naf(self, msg: MSG):
+        k = msg.data['from_session_id']
+        self.peers[k].update_from_naf(msg.data['data'])
+
+    def _on_nafr(self, msg: MSG):
+        if msg.naf['dataType'] == 'um':
+            self.peers[msg.data['from_session_id']].update_from_nafr_um(msg.naf['data'])
+
+    async def _on_message(self, msg: MSG):
+        body = msg.data['body']
+        sid = msg.data['session_id']
+        if sid != self.hubs_client.sid and sid in self.text_consumers.keys():
+            await self.text_consumers[sid].on_message(Message(body=body))
 
     async def _send_naf(self):
         while True:
-            await self.hubs_client.sync()
+            try:
+                await self.hubs_client.sync()
+            except Exception as err:
+                # e.g. the socket is closed under the sync, the reconnection is handled by the receiver
+                logging.error(f'Caught exception while syncing the avatar: {err}')
             await asyncio.sleep(1)
 
     # ---
     # The following functions are mediasoup protocol's internals
 
-    async def _send_mediasoup_request(self, req: dict):
-        # create an empty future, that would be set when corresponding message is received
-        # in _on_mediasoup_message_received
-        logging.debug(f'Sending request: {req}')
-        self.pending_mediasoup_requests[req['id']] = asyncio.get_running_loop().create_future()
-        await self.voice_socket.send(json.dumps(req))
-
-    async def _wait_for_mediasoup_response(self, id: int, timeout=30):
-        try:
-            resp = await asyncio.wait_for(self.pending_mediasoup_requests[id], timeout=timeout)
-            logging.debug(f'Received response: {resp}')
-            return resp
-        except asyncio.TimeoutError as err:
-            raise TimeoutError(f'Timeout error waiting for the request id {id}: {err}')
-
     async def _load_mediasoup(self):
-        req_id = generateRandomNumber()
-        req = {'request': True, 'id': req_id, 'method': 'getRouterRtpCapabilities', 'data': {}}
-        await self._send_mediasoup_request(req)
-        resp = await self._wait_for_mediasoup_response(req_id)
+        data = await self.protoo.request('getRouterRtpCapabilities')
 
         # Load Router RtpCapabilities
-        await self.media_device.load(resp['data'])
+        await self.media_device.load(data)
 
     async def _create_mediasoup_send_transport(self) -> Transport:
         """
         Creates a send Transport (see mediasoup docs for ref)
         """
-        req_id = generateRandomNumber()
-        req = {
-            'request': True,
-            'id': req_id,
-            'method': 'createWebRtcTransport',
-            'data': {
-                'forceTcp': False,
-                'producing': True,
-                'consuming': False,
-                'sctpCapabilities': self.media_device.sctpCapabilities.dict()
-            }
-        }
-        await self._send_mediasoup_request(req)
-        resp = await self._wait_for_mediasoup_response(req_id)
+        data = await self.protoo.request('createWebRtcTransport', {
+            'forceTcp': False,
+            'producing': True,
+            'consuming': False,
+            'sctpCapabilities': self.media_device.sctpCapabilities.dict()
+        })
 
         # Create sendTransport
         send_transport = self.media_device.createSendTransport(
-            id=resp['data']['id'],
-            iceParameters=resp['data']['iceParameters'],
-            iceCandidates=resp['data']['iceCandidates'],
-            dtlsParameters=resp['data']['dtlsParameters'],
-            sctpParameters=resp['data']['sctpParameters']
+            id=data['id'],
+            iceParameters=data['iceParameters'],
+            iceCandidates=data['iceCandidates'],
+            dtlsParameters=data['dtlsParameters'],
+            sctpParameters=data['sctpParameters']
         )
 
         @send_transport.on('connect')
         async def on_connect(dtlsParameters):
-            req_id = generateRandomNumber()
-            req = {
-                "request": True,
-                "id": req_id,
-                "method": "connectWebRtcTransport",
-                "data": {
-                   "transportId": send_transport.id,
-                   "dtlsParameters": dtlsParameters.dict(exclude_none=True)
-                }
-            }
-            await self._send_mediasoup_request(req)
-            await self._wait_for_mediasoup_response(req_id)
+            await self.protoo.request('connectWebRtcTransport', {
+                'transportId': send_transport.id,
+                'dtlsParameters': dtlsParameters.dict(exclude_none=True)
+            })
 
         @send_transport.on('produce')
         async def on_produce(kind: str, rtpParameters, appData: dict):
-            req_id = generateRandomNumber()
-            req = {
-                "id": req_id,
-                'method': 'produce',
-                'request': True,
-                'data': {
-                    'transportId': send_transport.id,
-                    'kind': kind,
-                    'rtpParameters': rtpParameters.dict(exclude_none=True),
-                    'appData': appData
-                }
-            }
-            await self._send_mediasoup_request(req)
-            resp = await self._wait_for_mediasoup_response(req_id)
-            return resp['data']['id']
+            data = await self.protoo.request('produce', {
+                'transportId': send_transport.id,
+                'kind': kind,
+                'rtpParameters': rtpParameters.dict(exclude_none=True),
+                'appData': appData
+            })
+            return data['id']
 
         @send_transport.on('producedata')
         async def on_producedata(sctpStreamParameters: SctpStreamParameters, label: str, protocol: str, appData: dict):
-            req_id = generateRandomNumber()
-            req = {
-                "id": req_id,
-                'method': 'produceData',
-                'request': True,
-                'data': {
-                   'transportId': send_transport.id,
-                   'label': label,
-                   'protocol': protocol,
-                   'sctpStreamParameters': sctpStreamParameters.dict(exclude_none=True),
-                   'appData': appData
-                }
-            }
-            await self._send_mediasoup_request(req)
-            resp = await self._wait_for_mediasoup_response(req_id)
-            return resp['data']['id']
+            data = await self.protoo.request('produceData', {
+                'transportId': send_transport.id,
+                'label': label,
+                'protocol': protocol,
+                'sctpStreamParameters': sctpStreamParameters.dict(exclude_none=True),
+                'appData': appData
+            })
+            return data['id']
 
         return send_transport
 
@@ -314,107 +413,129 @@ class Bot:
         """
         Creates a receiver Transport (see mediasoup docs for ref)
         """
-        req_id = generateRandomNumber()
-        req = {
-            'request': True,
-            'id': req_id,
-            'method': 'createWebRtcTransport',
-            'data': {
-                'forceTcp': False,
-                'producing': False,
-                'consuming': True,
-                'sctpCapabilities': self.media_device.sctpCapabilities.dict()
-            }
-        }
-        await self._send_mediasoup_request(req)
-        resp = await self._wait_for_mediasoup_response(req_id)
+        data = await self.protoo.request('createWebRtcTransport', {
+            'forceTcp': False,
+            'producing': False,
+            'consuming': True,
+            'sctpCapabilities': self.media_device.sctpCapabilities.dict()
+        })
         recv_transport = self.media_device.createRecvTransport(
-            id=resp['data']['id'],
-            iceParameters=resp['data']['iceParameters'],
-            iceCandidates=resp['data']['iceCandidates'],
-            dtlsParameters=resp['data']['dtlsParameters'],
-            sctpParameters=resp['data']['sctpParameters']
+            id=data['id'],
+            iceParameters=data['iceParameters'],
+            iceCandidates=data['iceCandidates'],
+            dtlsParameters=data['dtlsParameters'],
+            sctpParameters=data['sctpParameters']
         )
 
         @recv_transport.on('connect')
         async def on_connect(dtlsParameters):
-            req_id = generateRandomNumber()
-            req = {
-                "request": True,
-                "id": req_id,
-                "method": "connectWebRtcTransport",
-                "data": {
-                    "transportId": recv_transport.id,
-                    "dtlsParameters": dtlsParameters.dict(exclude_none=True)
-                }
-            }
-            await self._send_mediasoup_request(req)
-            await self._wait_for_mediasoup_response(req_id)
+            await self.protoo.request('connectWebRtcTransport', {
+                'transportId': recv_transport.id,
+                'dtlsParameters': dtlsParameters.dict(exclude_none=True)
+            })
 
         return recv_transport
 
+    async def _join_mediasoup_room(self):
+        await self.protoo.request('join', {
+            'displayName': '0359749b-d457-4a8a-8d47-8ce682f08da5',
+            'device': {'flag': 'python', 'name': 'python', 'version': '0.1.0'},
+            'rtpCapabilities': self.media_device.rtpCapabilities.dict(exclude_none=True),
+            'sctpCapabilities': self.media_device.sctpCapabilities.dict(exclude_none=True),
+            'token': f'{self.voice_token}'
+        })
+
     async def _start_mediasoup_producing(self):
-        req_id = generateRandomNumber()
-        req = {
-            "request": True,
-            "id": req_id,
-            "method": "join",
-            "data": {
-                "displayName": "0359749b-d457-4a8a-8d47-8ce682f08da5",
-                "device": {"flag": "python", "name": "python", "version": "0.1.0"},
-                "rtpCapabilities": self.media_device.rtpCapabilities.dict(exclude_none=True),
-                "sctpCapabilities": self.media_device.sctpCapabilities.dict(exclude_none=True),
-                "token": f'{self.voice_token}'
-            }
-        }
-        await self._send_mediasoup_request(req)
-        await self._wait_for_mediasoup_response(req_id)
-
-        # produce
+        # producers are created one by one: each of them renegotiates the same peer connection of the send transport
         self.video_producer = await self.send_transport.produce(track=self.video_track, stopTracks=False, appData={})
         self.audio_producer = await self.send_transport.produce(track=self.audio_track, stopTracks=False, appData={})
         self.data_producer = await self.send_transport.produceData(ordered=False, maxPacketLifeTime=5555,
             label='chat', protocol='', appData={'info': "my-chat-DataProducer"})
 
-    async def _mediasoup_receive(self):
+    async def _mediasoup_receive(self, protoo: ProtooClient):
         """
         Reads everything that is sent by mediasoup server.
-        Calls _on_new_consumer if  'method': 'newPeer' is received, and manages pending_mediasoup_requests.
+        Calls _on_new_consumer if  'method': 'newPeer' is received, and passes responses to the protoo client.
+        Reconnects if the socket is closed unexpectedly.
         """
         while True:
             try:
-                msg = await self.voice_socket.recv()
+                msg = await protoo.socket.recv()
                 msg = json.loads(msg)
-                logging.debug(f'Received response: {msg}')
+                logging.debug(f'Received message: {msg}')
                 if msg.get('response'):
-                    self.pending_mediasoup_requests[msg['id']].set_result(msg)
+                    protoo.handle_response(msg)
                 elif msg.get('request'):
-                    if msg['method'] == 'newConsumer' and msg['data']['peerId'] != self.voice_peer_id:
-                        await self._on_mediasoup_new_consumer(
-                            id=msg['data']['id'],
-                            producer_id=msg['data']['producerId'],
-                            peer_id=msg['data']['peerId'],
-                            kind=msg['data']['kind'],
-                            rtp_parameters=msg['data']['rtpParameters']
-                        )
-                        response = {'response': True, 'id': msg['id'], 'ok': True, 'data': {}}
-                        await self.voice_socket.send(json.dumps(response))
+                    # consumers are set up in background tasks, so that the responses are not blocked by the setup
+                    data = msg['data']
+                    if msg['method'] == 'newConsumer' and data['peerId'] != self.voice_peer_id:
+                        self._setup_consumer(protoo, msg['id'], lambda data=data: self._on_mediasoup_new_consumer(
+                            id=data['id'],
+                            producer_id=data['producerId'],
+                            peer_id=data['peerId'],
+                            kind=data['kind'],
+                            rtp_parameters=data['rtpParameters']
+                        ))
                     elif msg.get('method') == 'newDataConsumer':
-                        await self._on_mediasoup_new_data_consumer(
-                            id=msg['data']['id'],
-                            data_producer_id=msg['data']['dataProducerId'],
-                            label=msg['data']['label'],
-                            protocol=msg['data']['protocol'],
-                            sctp_stream_parameters=msg['data']['sctpStreamParameters'],
+                        self._setup_consumer(protoo, msg['id'], lambda data=data: self._on_mediasoup_new_data_consumer(
+                            id=data['id'],
+                            data_producer_id=data['dataProducerId'],
+                            peer_id=data.get('peerId'),
+                            label=data['label'],
+                            protocol=data['protocol'],
+                            sctp_stream_parameters=data['sctpStreamParameters'],
                             appData={}
-                        )
-                        response = {'response': True, 'id': msg['data']['id'], 'ok': True, 'data': {}}
-                        await self.voice_socket.send(json.dumps(response))
+                        ))
                 elif msg.get('notification'):
                     logging.debug(f'Notification received: {msg}')
+                    self._on_mediasoup_notification(msg['method'], msg.get('data', {}))
+            except ConnectionClosed as err:
+                # the client is replaced on reconnection to Hubs
+                if not self._closing and protoo is self.protoo:
+                    logging.warning(f'Mediasoup connection closed: {err}')
+                    self._create_task(self._reconnect_media())
+                return
             except Exception as err:
                 logging.error(f'Caught exception in the mediasoup messages receiver loop: {err}')
 
+    def _on_mediasoup_notification(self, method: str, data: dict):
+        entries = []
+        if method == 'consumerClosed':
+            entries = [self.consumers.pop(data['consumerId'])]
+        elif method == 'dataConsumerClosed':
+            entries = [self.consumers.pop(data['dataConsumerId'])]
+        elif method == 'peerClosed':
+            self.text_consumers.pop(data['peerId'], None)
+            entries = self.consumers.pop_peer(data['peerId'])
+        entries = [e for e in entries if e is not None]
+        if len(entries) > 0:
+            self._create_task(self._close_consumers(entries))
+
+    def _setup_consumer(self, protoo: ProtooClient, request_id: int, setup: Callable[[], Awaitable]) -> asyncio.Task:
+        """
+        Runs the consumer setup in a task, which is cancelled when the media connection is closed.
+        The request of the server is answered once the consumer is created, errors are logged and sent back.
+
+        :param setup: Function creating the setup coroutine
+        """
+        async def run():
+            try:
+                try:
+                    await setup()
+                except Exception as err:
+                    self.consumer_setup_failures += 1
+                    logging.error(f'Caught exception while setting up a consumer: {err}')
+                    await protoo.reject(request_id, 500, str(err))
+                else:
+                    await protoo.respond(request_id)
+            except ConnectionClosed:
+                pass  # the request is gone along with the connection
+
+        task = asyncio.create_task(run())
+        self._setup_tasks.add(task)
+        task.add_done_callback(self._setup_tasks.discard)
+        return task
+
     async def _on_mediasoup_new_consumer(self, id: str, producer_id: str, peer_id: str, kind: str, rtp_parameters: dict):
         """
         Called when a new remote voice-producer is joined the room.
@@ -422,25 +543,32 @@ class Bot:
         """
         if peer_id not in self.peers.keys():
             return
-        mediasoup_consumer = await self.recv_transport.consume(id=id, producerId=producer_id, kind=kind, rtpParameters=rtp_parameters)
+        async with self._consume_lock:
+            mediasoup_consumer = await self.recv_transport.consume(id=id, producerId=producer_id, kind=kind, rtpParameters=rtp_parameters)
+        if peer_id not in self.peers.keys():
+            # the peer has left during the setup
+            await mediasoup_consumer.close()
+            return
         consumer = self.consumer_factory.create_voice_consumer(self.peers[peer_id], mediasoup_consumer.track)
-        self.consumers.append((consumer, mediasoup_consumer))
-        self.text_consumers[peer_id] = self.consumer_factory.create_text_consumer(self.peers[peer_id])
-        asyncio.create_task(consumer.start())
+        self.consumers.add(ConsumerEntry(peer_id, kind, mediasoup_consumer, consumer))
+        if peer_id not in self.text_consumers:
+            self.text_consumers[peer_id] = self.consumer_factory.create_text_consumer(self.peers[peer_id])
+        self._create_task(consumer.start())
 
-    async def _on_mediasoup_new_data_consumer(self, id: str, data_producer_id: str, sctp_stream_parameters: dict,
-                                              label: str, protocol: str, appData: dict):
+    async def _on_mediasoup_new_data_consumer(self, id: str, data_producer_id: str, peer_id: str | None,
+                                              sctp_stream_parameters: dict, label: str, protocol: str, appData: dict):
         """
         DataConsumers are not used by Hubs, but it seems to be necessary to initialize one to get the protocol working :/
         """
-        dataConsumer = await self.recv_transport.consumeData(
-            id=id, dataProducerId=data_producer_id,
-            sctpStreamParameters=sctp_stream_parameters,
-            label=label,
-            protocol=protocol,
-            appData=appData
-        )
-        self.consumers.append((None, dataConsumer))
+        async with self._consume_lock:
+            dataConsumer = await self.recv_transport.consumeData(
+                id=id, dataProducerId=data_producer_id,
+                sctpStreamParameters=sctp_stream_parameters,
+                label=label,
+                protocol=protocol,
+                appData=appData
+            )
+        self.consumers.add(ConsumerEntry(peer_id, 'data', dataConsumer))
 
         @dataConsumer.on('message')
         def on_message(message):
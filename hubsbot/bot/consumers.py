@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+
+from pymediasoup.consumer import Consumer
+from pymediasoup.data_consumer import DataConsumer
+
+from hubsbot.consumer import VoiceConsumer
+
+
+@dataclass
+class ConsumerEntry:
+    peer_id: str | None
+    kind: str  # 'audio', 'video' or 'data'
+    consumer: Consumer | DataConsumer = field(repr=False)
+    voice_consumer: VoiceConsumer | None = field(default=None, repr=False)
+
+    @property
+    def id(self) -> str:
+        return self.consumer.id
+
+
+class ConsumerRegistry:
+    def __init__(self):
+        """
+        Mediasoup consumers of the bot indexed by their ids and by the ids of the remote peers.
+        """
+        self._entries: Dict[str, ConsumerEntry] = {}
+        self._by_peer: Dict[str | None, Dict[str, ConsumerEntry]] = {}
+
+    def add(self, entry: ConsumerEntry):
+        self._entries[entry.id] = entry
+        self._by_peer.setdefault(entry.peer_id, {})[entry.id] = entry
+
+    def get(self, peer_id: str | None, kind: str | None = None) -> List[ConsumerEntry]:
+        """
+        :param peer_id: Id of the remote peer
+        :param kind: Kind of the consumers, all kinds if not given
+        :return: Consumers of the peer
+        """
+        entries = self._by_peer.get(peer_id, {}).values()
+        return [e for e in entries if kind is None or e.kind == kind]
+
+    def pop(self, id: str) -> ConsumerEntry | None:
+        """
+        Removes the consumer by its id.
+        """
+        entry = self._entries.pop(id, None)
+        if entry is not None:
+            peer_entries = self._by_peer[entry.peer_id]
+            del peer_entries[id]
+            if len(peer_entries) == 0:
+                del self._by_peer[entry.peer_id]
+        return entry
+
+    def pop_peer(self, peer_id: str | None) -> List[ConsumerEntry]:
+        """
+        Removes all consumers of the peer.
+        """
+        entries = list(self._by_peer.pop(peer_id, {}).values())
+        for entry in entries:
+            del self._entries[entry.id]
+        return entries
+
+    def clear(self) -> List[ConsumerEntry]:
+        """
+        Removes all consumers.
+        """
+        entries = list(self._entries.values())
+        self._entries.clear()
+        self._by_peer.clear()
+        return entries
+
+    def peers(self) -> List[str | None]:
+        return list(self._by_peer.keys())
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._entries
+
+    def __iter__(self) -> Iterator[ConsumerEntry]:
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,103 @@
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Iterable, Tuple
+
+
+@dataclass
+class EventStats:
+    """
+    Handling statistics of a single event type.
+    """
+    count: int = 0 # number of handled events
+    total_time: float = 0 # total handling time, seconds
+    max_time: float = 0 # the longest single handling time, seconds
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count > 0 else 0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+
+class EventDispatcher:
+    def __init__(self):
+        """
+        Routes Hubs events to the handlers registered for the event name.
+
+        Handlers receive the dispatched message and may be either plain functions or coroutine functions.
+        Besides routing, the dispatcher keeps counters which show whether the bot keeps up with the room:
+        per-event handling time (``stats``) and the depth of the inbound backlog (``backlog``, ``max_backlog``).
+        """
+        self.handlers: Dict[str, List[Callable]] = {}
+        self.stats: Dict[str, EventStats] = {}
+
+        self.batches = 0 # number of drained batches
+        self.last_batch = 0 # size of the last drained batch
+        self.max_batch = 0 # the biggest drained batch
+        self.backlog = 0 # frames left unread after the last batch
+        self.max_backlog = 0 # the biggest observed backlog
+        self.unhandled = 0 # events without a registered handler
+
+    def register(self, event: str, handler: Callable):
+        """
+        Registers a handler for the event. Several handlers of a single event are called in the registration order.
+
+        :param event: Event name (e.g. 'naf' or 'presence_diff')
+        :param handler: Function or coroutine function accepting the message
+        """
+        self.handlers.setdefault(event, []).append(handler)
+
+    def unregister(self, event: str, handler: Callable):
+        handlers = self.handlers.get(event, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if len(handlers) == 0:
+            self.handlers.pop(event, None)
+
+    async def dispatch(self, event: str, data):
+        """
+        Calls all handlers of the event with the given message.
+        Exceptions raised by a handler are logged and do not prevent other events from being handled.
+        """
+        handlers = self.handlers.get(event)
+        if handlers is None:
+            self.unhandled += 1
+            return
+
+        start = time.perf_counter()
+        for handler in handlers:
+            try:
+                res = handler(data)
+                if inspect.isawaitable(res):
+                    await res
+            except Exception as err:
+                logging.error(f'Caught exception in the handler of "{event}": {err}')
+
+        stats = self.stats.get(event)
+        if stats is None:
+            stats = self.stats[event] = EventStats()
+        stats.add(time.perf_counter() - start)
+
+    async def dispatch_batch(self, events: Iterable[Tuple[str, object]], backlog: int = 0):
+        """
+        Dispatches a batch of events drained in a single wake-up.
+
+        :param events: Iterable of (event, message) pairs
+        :param backlog: Number of frames which were still pending when the batch was taken
+        """
+        n = 0
+        for event, data in events:
+            await self.dispatch(event, data)
+            n += 1
+
+        self.batches += 1
+        self.last_batch = n
+        self.max_batch = max(self.max_batch, n)
+        self.backlog = backlog
+        self.max_backlog = max(self.max_backlog, backlog)
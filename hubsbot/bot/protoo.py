@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import time
+from bisect import bisect_left
+from itertools import count
+from typing import Dict, Tuple
+
+
+class ProtooError(Exception):
+    def __init__(self, method: str, code, reason: str):
+        """
+        Error response to a protoo request.
+        """
+        super().__init__(f'Request "{method}" failed with code {code}: {reason}')
+        self.method = method
+        self.code = code
+        self.reason = reason
+
+
+class LatencyHistogram:
+    # upper bounds of the buckets, seconds
+    BOUNDS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+    def __init__(self):
+        """
+        Histogram of round-trip times.
+        """
+        self.buckets = [0] * len(self.BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.buckets[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0
+
+    def quantile(self, q: float) -> float:
+        """
+        :return: Upper bound of the bucket containing the quantile
+        """
+        rank = q * self.count
+        acc = 0
+        for bound, n in zip(self.BOUNDS, self.buckets):
+            acc += n
+            if acc >= rank and acc > 0:
+                return bound
+        return 0
+
+    def __repr__(self):
+        return f'LatencyHistogram(count={self.count}, mean={self.mean:.4f}, p50={self.quantile(0.5)}, ' \
+               f'p99={self.quantile(0.99)}, max={self.max:.4f})'
+
+
+class ProtooClient:
+    def __init__(self, socket, timeout: float = 30):
+        """
+        Client side of the protoo request/response protocol used by the mediasoup server.
+        Any number of requests may be in flight at once, responses are matched by ids.
+
+        The client does not read the socket: received responses have to be passed to :meth:`handle_response`.
+
+        :param socket: Connected websocket
+        :param timeout: Default timeout of requests, seconds
+        """
+        self.socket = socket
+        self.timeout = timeout
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self._ids = count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def request(self, method: str, data: dict | None = None, timeout: float | None = None) -> dict:
+        """
+        Sends the request and waits for the response.
+
+        :param method: Method name
+        :param data: Request data
+        :param timeout: Timeout, seconds. Defaults to the client timeout.
+        :return: Data of the response
+        """
+        id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[id] = future
+        req = {'request': True, 'id': id, 'method': method, 'data': data or {}}
+        logging.debug(f'Sending request: {req}')
+        start = time.perf_counter()
+        try:
+            await self.socket.send(json.dumps(req))
+            resp = await asyncio.wait_for(future, timeout=timeout or self.timeout)
+        except asyncio.TimeoutError as err:
+            raise TimeoutError(f'Timeout error waiting for the request "{method}" id {id}: {err}')
+        finally:
+            self._pending.pop(id, None)
+
+        histogram = self.latency.get(method)
+        if histogram is None:
+            histogram = self.latency[method] = LatencyHistogram()
+        histogram.add(time.perf_counter() - start)
+
+        logging.debug(f'Received response: {resp}')
+        if not resp.get('ok', True):
+            raise ProtooError(method, resp.get('errorCode'), resp.get('errorReason'))
+        return resp.get('data', {})
+
+    def handle_response(self, msg: dict):
+        """
+        Resolves the pending request the response belongs to. Responses to unknown (e.g. timed out) requests are ignored.
+        """
+        future = self._pending.get(msg['id'])
+        if future is not None and not future.done():
+            future.set_result(msg)
+
+    async def respond(self, id: int, data: dict | None = None):
+        """
+        Sends a successful response to the request of the server.
+        """
+        await self.socket.send(json.dumps({'response': True, 'id': id, 'ok': True, 'data': data or {}}))
+
+    async def reject(self, id: int, code: int, reason: str):
+        """
+        Sends an error response to the request of the server.
+        """
+        await self.socket.send(json.dumps({'response': True, 'id': id, 'ok': False,
+                                           'errorCode': code, 'errorReason': reason}))
+
+    def close(self):
+        """
+        Cancels all pending requests.
+        """
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
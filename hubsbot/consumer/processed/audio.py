@@ -0,0 +1,160 @@
+"""
+Conversion of decoded audio frames to the raw PCM expected by speech recognizers.
+"""
+from math import gcd
+from typing import List
+
+import numpy as np
+from av import AudioFrame
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+
+def frame_to_array(frame: AudioFrame) -> np.ndarray:
+    """
+    :return: Samples of the frame, shape (samples, channels). A view for both packed and planar formats.
+    """
+    samples = frame.to_ndarray()
+    if frame.format.is_planar:
+        return samples.T
+    return samples.reshape(-1, len(frame.layout.channels))
+
+
+def to_mono_int16(samples: np.ndarray) -> np.ndarray:
+    """
+    Downmixes the samples to mono by averaging the channels and converts them to int16.
+
+    :param samples: Samples of any sample format, shape (samples, channels)
+    """
+    channels = samples.shape[1]
+    kind, bits = samples.dtype.kind, 8 * samples.dtype.itemsize
+    if kind == 'f':
+        mono = samples[:, 0] if channels == 1 else samples.mean(axis=1, dtype=np.float32)
+        return np.clip(mono * 32768, -32768, 32767).astype(np.int16)
+
+    if kind == 'u':
+        # unsigned formats (u8) are offset by the half of the range
+        samples = samples.astype(np.int32) - (1 << (bits - 1))
+    if channels == 1:
+        mono = samples[:, 0]
+    else:
+        mono = samples.sum(axis=1, dtype=np.int64 if bits > 16 else np.int32) // channels
+    if bits > 16:
+        mono = mono >> (bits - 16)
+    elif bits < 16:
+        mono = mono << (16 - bits)
+    return mono.astype(np.int16, copy=False)
+
+
+class PolyphaseResampler:
+    def __init__(self, src_rate: int, dst_rate: int, zero_crossings: int = 8, beta: float = 5.0):
+        """
+        Stateful polyphase resampler of a mono stream, which can be fed in chunks of any length.
+        The result of the chunks is the same as of the whole stream, delayed by the half of the filter length.
+
+        :param src_rate: Sample rate of the input
+        :param dst_rate: Sample rate of the output
+        :param zero_crossings: Number of zero crossings of the windowed sinc filter on each side
+        :param beta: Beta of the Kaiser window
+        """
+        g = gcd(src_rate, dst_rate)
+        self.up, self.down = dst_rate // g, src_rate // g
+        # low-pass filter at the upsampled rate with the cutoff at the lower of the Nyquist frequencies
+        factor = max(self.up, self.down)
+        half = zero_crossings * factor
+        n = np.arange(-half, half + 1)
+        h = np.sinc(n / factor) * np.kaiser(len(n), beta) * (self.up / factor)
+        self.taps = -(-len(h) // self.up)
+        h = np.concatenate((h, np.zeros(self.taps * self.up - len(h))))
+        # phases[p, t] multiplies the t-th sample of the window ending at the current input sample
+        self.phases = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+        self.delay = half  # delay of the output at the upsampled rate
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the state to start a new stream.
+        """
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._next = 0  # position of the next output at the upsampled rate, relative to the start of the next chunk
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        :param samples: The next chunk of int16 samples
+        :return: Resampled int16 samples
+        """
+        size = len(samples)
+        buf = np.concatenate((self._history, samples.astype(np.float32)))
+        total = size * self.up
+        count = max(0, -(-(total - self._next) // self.down))
+        positions = self._next + self.down * np.arange(count)
+        self._next += self.down * count - total
+        self._history = buf[len(buf) - (self.taps - 1):]
+
+        phase = positions % self.up
+        start = positions // self.up  # the window of an output is buf[start:start + taps]
+        y = np.zeros(count, dtype=np.float32)
+        for t in range(self.taps):
+            coef = self.phases[0, t] if self.up == 1 else self.phases[phase, t]
+            y += coef * buf[start + t]
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+    def flush(self) -> np.ndarray:
+        """
+        Ends the stream and resets the state.
+
+        :return: The tail of the stream, which is held back by the filter delay
+        """
+        tail = self.process(np.zeros(-(-self.delay // self.up), dtype=np.int16))
+        self.reset()
+        return tail
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    Resamples the whole mono int16 signal with a polyphase filter, using scipy if it is installed.
+    """
+    if resample_poly is None:
+        resampler = PolyphaseResampler(src_rate, dst_rate)
+        y = np.concatenate((resampler.process(samples), resampler.flush()))
+        # the output of the stream is delayed, the tail is emitted by the flush
+        start = resampler.delay // resampler.down
+        return y[start:start + -(-len(samples) * resampler.up // resampler.down)]
+    g = gcd(src_rate, dst_rate)
+    y = resample_poly(samples.astype(np.float32), dst_rate // g, src_rate // g)
+    return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+def frames_to_pcm16(frames: List[AudioFrame], sample_rate: int | None = None, pad: float = 0,
+                    resampler: PolyphaseResampler | None = None) -> np.ndarray:
+    """
+    Converts the frames to a contiguous mono int16 buffer.
+    The frames are stacked with a single copy, and the rest is done on the whole phrase at once.
+
+    :param frames: Frames of the same format and sample rate
+    :param sample_rate: Sample rate of the result, defaults to the sample rate of the frames
+    :param pad: Length of the silence added to both ends, seconds
+    :param resampler: Resampler keeping the state between the calls, used to convert a stream chunk by chunk.
+        The whole input is resampled at once if it is not given.
+    :return: Samples, ``.data`` can be passed to the recognizer as is
+    """
+    if len(frames) == 0:
+        mono = np.empty(0, dtype=np.int16)
+    else:
+        mono = to_mono_int16(np.concatenate([frame_to_array(f) for f in frames]))
+        if resampler is not None:
+            mono = resampler.process(mono)
+        elif sample_rate is not None and sample_rate != frames[0].sample_rate:
+            mono = resample(mono, frames[0].sample_rate, sample_rate)
+    if sample_rate is None:
+        sample_rate = frames[0].sample_rate if len(frames) > 0 else 0
+
+    pad_samples = int(pad * sample_rate)
+    if pad_samples == 0:
+        return np.ascontiguousarray(mono)
+    pcm = np.zeros(len(mono) + 2 * pad_samples, dtype=np.int16)
+    pcm[pad_samples:pad_samples + len(mono)] = mono
+    return pcm
@@ -1,6 +1,7 @@
 import asyncio
+from collections import deque
 from enum import Enum
-from typing import List
+from typing import Deque, List
 
 from av import AudioFrame
 
@@ -8,34 +9,11 @@ from aiortc import MediaStreamTrack
 from aiortc.mediastreams import MediaStreamError
 
 from hubsbot.consumer import VoiceConsumer
+from .vad import AmplitudeVAD, VoiceActivityDetector, create_detector, get_frame_time
 
-import numpy as np
 import matplotlib.pyplot as plt
 
 
-def get_frame_time(frame):
-    return frame.samples / frame.sample_rate
-
-
-class SlidingAverage:
-    frames: List[np.ndarray] = []
-    lengths: List[float] = []
-    length: float = 0
-
-    def __init__(self, length):
-        self.length = length
-
-    def add_frame(self, frame: AudioFrame):
-        self.lengths.append(get_frame_time(frame))
-        self.frames.append(frame.to_ndarray())
-        if sum(self.lengths)>self.length:
-            self.frames.pop(0)
-            self.lengths.pop(0)
-
-    def calc(self):
-        return np.abs(np.concatenate(self.frames, axis=1)).mean()
-
-
 class State(Enum):
     Phrase = 0
     Pause = 1
@@ -45,7 +23,8 @@ class PhrasesVoiceConsumer(VoiceConsumer):
     """
     This consumer provides an abstract method ``on_phrase`` which is called when a phrase was separated from the
     input track.
-    Phrases are separated based on the sliding-window amplitude of the input frames.
+    Phrases are separated by a voice activity detector, by default based on the sliding-window amplitude of the input
+    frames.
     """
 
     async def on_phrase(self, frames: List[AudioFrame]):
@@ -55,35 +34,100 @@ class PhrasesVoiceConsumer(VoiceConsumer):
         """
         pass
 
-    def __init__(self, track: MediaStreamTrack, sliding_length: float = 0.5, amp_threshold: float = 200):
+    async def on_phrase_begin(self):
+        """Called when a new phrase is started, before its first frame is passed to ``on_phrase_frame``."""
+        pass
+
+    async def on_phrase_frame(self, frame: AudioFrame):
+        """Receives frames of the current phrase as they arrive, including the pre-roll.
+        The same frames are passed to ``on_phrase`` when the phrase ends.
+        """
+        pass
+
+    def __init__(self, track: MediaStreamTrack, sliding_length: float = 0.5, amp_threshold: float = 200,
+                 pre_roll: float = 0.3, hangover: float = 0.2, max_phrase_length: float = 15,
+                 vad: VoiceActivityDetector | str | None = None):
+        """
+        :param track: The input track
+        :param sliding_length: Length of the amplitude averaging window, seconds. Used only if ``vad`` is not given.
+        :param amp_threshold: Mean absolute amplitude above which the input is considered a speech.
+            Used only if ``vad`` is not given.
+        :param pre_roll: Length of the input preceding the detected phrase start, which is prepended to the phrase, seconds
+        :param hangover: Length of the quiet input required to end a phrase, it is included into the phrase, seconds
+        :param max_phrase_length: Length of the phrase after which it is emitted even if the speech goes on, seconds
+        :param vad: Voice activity detector or its name (see :data:`vad.detectors`).
+            Detectors are stateful, so an instance must not be shared between consumers.
+        """
         self.track = track
-        self.frames = []
+        self.frames: List[AudioFrame] = []  # the current phrase
         self.sliding_length = sliding_length
         self.amp_threshold = amp_threshold
+        self.pre_roll = pre_roll
+        self.hangover = hangover
+        self.max_phrase_length = max_phrase_length
+        if vad is None:
+            vad = AmplitudeVAD(sliding_length, amp_threshold)
+        elif isinstance(vad, str):
+            vad = create_detector(vad)
+        self.vad = vad
         self.stopped = False
+        self._pre_roll_frames: Deque[AudioFrame] = deque()
+        self._pre_roll_time = 0.0
+
+    def _add_pre_roll(self, frame: AudioFrame, duration: float):
+        self._pre_roll_frames.append(frame)
+        self._pre_roll_time += duration
+        while self._pre_roll_time > self.pre_roll and len(self._pre_roll_frames) > 0:
+            self._pre_roll_time -= get_frame_time(self._pre_roll_frames.popleft())
+
+    async def _add_phrase_frame(self, frame: AudioFrame):
+        if len(self.frames) == 0:
+            await self.on_phrase_begin()
+        self.frames.append(frame)
+        await self.on_phrase_frame(frame)
+
+    async def _emit_phrase(self):
+        frames, self.frames = self.frames, []
+        await self.on_phrase(frames)
 
     async def start(self):
-        avg = SlidingAverage(self.sliding_length)
         state = State.Pause
-        phrase_started = 0
+        phrase_time = 0.0
+        quiet_time = 0.0
 
         while not self.stopped:
             try:
                 frame = await self.track.recv()
             except MediaStreamError:
                 break
-            self.frames.append(frame)
+            duration = get_frame_time(frame)
+            loud = self.vad(frame)
 
-            avg.add_frame(frame)
-            v = avg.calc()
-            if state == State.Pause and v > self.amp_threshold:
+            if state == State.Pause:
+                if not loud:
+                    self._add_pre_roll(frame, duration)
+                    continue
                 state = State.Phrase
-                phrase_started = len(self.frames)
-            elif state == State.Phrase and v < self.amp_threshold:
+                pre_roll = list(self._pre_roll_frames)
+                phrase_time, quiet_time = self._pre_roll_time, 0.0
+                self._pre_roll_frames.clear()
+                self._pre_roll_time = 0.0
+                for f in pre_roll:
+                    await self._add_phrase_frame(f)
+
+            await self._add_phrase_frame(frame)
+            phrase_time += duration
+            quiet_time = quiet_time + duration if not loud else 0.0
+            if quiet_time >= self.hangover:
                 state = State.Pause
-                await self.on_phrase(self.frames[phrase_started:])
-
-        await self.on_phrase(self.frames[phrase_started:])
+                await self._emit_phrase()
+            elif phrase_time >= self.max_phrase_length:
+                # split a continuous speech, the next part starts right away
+                phrase_time = 0.0
+                await self._emit_phrase()
+
+        if state == State.Phrase and len(self.frames) > 0:
+            await self._emit_phrase()
 
     async def stop(self):
         self.stopped = True
@@ -0,0 +1,132 @@
+"""
+Shared memory ring buffer passing audio to worker processes without pickling it.
+"""
+import sys
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Deque, Iterator, List, NamedTuple
+
+
+class RingRef(NamedTuple):
+    """Location of a chunk in a :class:`SharedRingBuffer`, cheap to send to another process."""
+    name: str
+    offset: int
+    length: int
+
+
+class SharedRingBuffer:
+    def __init__(self, size: int):
+        """
+        Fixed size buffer in shared memory with a single writer (the event loop) and readers in other processes.
+
+        Chunks are always stored contiguously: a chunk which does not fit into the tail is written at the beginning,
+        and the tail is skipped. A chunk is readable until it is released, and the space is reclaimed in the order
+        of writing, so chunks may be released in any order.
+
+        :param size: Size of the buffer, bytes
+        """
+        self.shm = SharedMemory(create=True, size=size)
+        self.size = size
+        self.write_pos = 0  # total number of bytes written, including the skipped tails
+        self.read_pos = 0  # total number of bytes reclaimed
+        self.closing = False
+        self._pending: Deque[List] = deque()  # [end position, released] of the written chunks
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def free(self) -> int:
+        return self.size - (self.write_pos - self.read_pos)
+
+    @property
+    def pending(self) -> int:
+        """Number of chunks which are not released yet."""
+        return len(self._pending)
+
+    def write(self, data: bytes) -> RingRef | None:
+        """
+        :return: Location of the chunk, or None if there is not enough free space
+        """
+        length = len(data)
+        if len(self._pending) == 0:
+            # nothing is readable, so the chunk may start at the beginning instead of skipping the tail
+            self.write_pos = self.read_pos = 0
+        offset = self.write_pos % self.size
+        skip = self.size - offset if offset + length > self.size else 0
+        if skip + length > self.free:
+            return None
+        if skip > 0:
+            offset = 0
+        self.shm.buf[offset:offset + length] = data
+        self.write_pos += skip + length
+        self._pending.append([self.write_pos, False])
+        return RingRef(self.name, offset, length)
+
+    def release(self, ref: RingRef):
+        """
+        Marks the chunk as read.
+        """
+        for entry in self._pending:
+            if not entry[1] and (entry[0] - ref.length) % self.size == ref.offset:
+                entry[1] = True
+                break
+        while len(self._pending) > 0 and self._pending[0][1]:
+            self.read_pos = self._pending.popleft()[0]
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Maps the existing buffer without registering it in the resource tracker. Before Python 3.13 attaching registers
+    the buffer, and the tracker of the reader unlinks it when the reader exits (python/cpython#82300).
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # unregistering after the attach would drop the registration of the writer too if the tracker is shared,
+    # so the registration is skipped instead
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class RingReader:
+    def __init__(self, max_open: int = 64):
+        """
+        Reading side of the ring buffers in a worker process.
+        Buffers stay mapped between chunks, the least recently used ones are unmapped above ``max_open``.
+        """
+        self.max_open = max_open
+        self._open: OrderedDict[str, SharedMemory] = OrderedDict()
+
+    @contextmanager
+    def view(self, ref: RingRef) -> Iterator[memoryview]:
+        """
+        Maps the chunk. The view must not be used after the context is exited.
+        """
+        shm = self._open.get(ref.name)
+        if shm is None:
+            shm = self._open[ref.name] = _attach(ref.name)
+            if len(self._open) > self.max_open:
+                self._open.popitem(last=False)[1].close()
+        else:
+            self._open.move_to_end(ref.name)
+        view = shm.buf[ref.offset:ref.offset + ref.length]
+        try:
+            yield view
+        finally:
+            view.release()
+
+    def close(self):
+        for shm in self._open.values():
+            shm.close()
+        self._open.clear()
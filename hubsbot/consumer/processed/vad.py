@@ -0,0 +1,268 @@
+"""
+Voice activity detectors.
+
+Every detector is stateful, so a separate instance has to be used for every input track.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+from av import AudioFrame
+
+from .audio import frame_to_array
+
+
+def get_frame_time(frame):
+    return frame.samples / frame.sample_rate
+
+
+class EnergyMeter:
+    def __init__(self, length: float, capacity: int = 64):
+        """
+        Mean absolute amplitude of the samples received during the last ``length`` seconds.
+        Every frame is reduced to its sum and sample count, which are kept in a ring buffer along with running totals,
+        so adding a frame costs O(1) besides the reduction of the frame itself.
+
+        :param length: Length of the window, seconds
+        :param capacity: Initial number of frames in the ring buffer, it is grown if the window holds more frames
+        """
+        self.length = length
+        self._sums = [0.0] * capacity
+        self._counts = [0] * capacity
+        self._times = [0.0] * capacity
+        self._head = 0  # index of the oldest frame
+        self._size = 0
+        self.total_sum = 0.0
+        self.total_count = 0
+        self.total_time = 0.0
+
+    def _grow(self):
+        capacity = len(self._sums)
+        order = [(self._head + i) % capacity for i in range(capacity)]
+        self._sums = [self._sums[i] for i in order] + [0.0] * capacity
+        self._counts = [self._counts[i] for i in order] + [0] * capacity
+        self._times = [self._times[i] for i in order] + [0.0] * capacity
+        self._head = 0
+
+    def add(self, samples: np.ndarray, duration: float):
+        """
+        :param samples: Samples of the frame, any shape
+        :param duration: Duration of the frame, seconds
+        """
+        if self._size == len(self._sums):
+            self._grow()
+        s = float(np.absolute(samples, dtype=np.float64).sum())
+        i = (self._head + self._size) % len(self._sums)
+        self._sums[i], self._counts[i], self._times[i] = s, samples.size, duration
+        self._size += 1
+        self.total_sum += s
+        self.total_count += samples.size
+        self.total_time += duration
+
+        # keep at least the newest frame
+        while self.total_time > self.length and self._size > 1:
+            h = self._head
+            self.total_sum -= self._sums[h]
+            self.total_count -= self._counts[h]
+            self.total_time -= self._times[h]
+            self._head = (h + 1) % len(self._sums)
+            self._size -= 1
+
+    def add_frame(self, frame: AudioFrame):
+        self.add(frame.to_ndarray(), get_frame_time(frame))
+
+    def calc(self) -> float:
+        return self.total_sum / self.total_count if self.total_count > 0 else 0.0
+
+    def __len__(self):
+        return self._size
+
+
+def frame_to_mono(frame: AudioFrame) -> np.ndarray:
+    """
+    :return: Samples of the frame downmixed to mono, float32 in range [-1, 1]
+    """
+    samples = frame_to_array(frame)
+    mono = samples.mean(axis=1, dtype=np.float32)
+    if samples.dtype.kind == 'i':
+        mono /= 2 ** (8 * samples.dtype.itemsize - 1)
+    return mono
+
+
+class VoiceActivityDetector(ABC):
+    @abstractmethod
+    def __call__(self, frame: AudioFrame) -> bool:
+        """
+        :return: Whether the input is considered a speech after the frame
+        """
+        pass
+
+
+class AmplitudeVAD(VoiceActivityDetector):
+    def __init__(self, sliding_length: float = 0.5, amp_threshold: float = 200):
+        """
+        Compares the sliding-window mean absolute amplitude with a fixed threshold.
+
+        :param sliding_length: Length of the window, seconds
+        :param amp_threshold: Threshold in the units of the samples (e.g. int16)
+        """
+        self.meter = EnergyMeter(sliding_length)
+        self.amp_threshold = amp_threshold
+
+    def __call__(self, frame: AudioFrame) -> bool:
+        self.meter.add_frame(frame)
+        return self.meter.calc() > self.amp_threshold
+
+
+class BlockVAD(VoiceActivityDetector):
+    def __init__(self, block_length: float = 0.01, hangover: float = 0.1):
+        """
+        Base class of the detectors classifying short blocks of mono samples.
+        Frames are cut into blocks (the remainder is carried over to the next frame), and all blocks of a frame are
+        classified at once by :meth:`classify`. The decisions are smoothed with a hangover: the speech lasts
+        until ``hangover`` seconds of non-speech blocks.
+
+        :param block_length: Length of a block, seconds
+        :param hangover: Hangover, seconds
+        """
+        self.block_length = block_length
+        self.hangover = hangover
+        self.speech = False
+        self._rest = np.empty(0, dtype=np.float32)
+        self._since_speech = np.iinfo(np.int64).max // 2  # number of blocks since the last speech block
+
+    @abstractmethod
+    def classify(self, blocks: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        :param blocks: Mono samples, shape (number of blocks, block size)
+        :param sample_rate: Sample rate
+        :return: Boolean array, True for the speech blocks
+        """
+        pass
+
+    def process(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        :param samples: Mono float samples
+        :param sample_rate: Sample rate
+        :return: Smoothed decisions for the complete blocks
+        """
+        block_size = max(1, int(self.block_length * sample_rate))
+        samples = np.concatenate((self._rest, samples)) if len(self._rest) > 0 else samples
+        n = len(samples) // block_size
+        self._rest = samples[n * block_size:]
+        if n == 0:
+            return np.empty(0, dtype=bool)
+
+        flags = self.classify(samples[:n * block_size].reshape(n, block_size), sample_rate)
+        # index of the last speech block at or before every block, the previous frames are at negative indices
+        ix = np.arange(n)
+        last = np.maximum.accumulate(np.where(flags, ix, -1 - self._since_speech))
+        since = ix - last
+        self._since_speech = int(since[-1])
+        return since <= int(self.hangover / self.block_length)
+
+    def __call__(self, frame: AudioFrame) -> bool:
+        decisions = self.process(frame_to_mono(frame), frame.sample_rate)
+        if len(decisions) > 0:
+            self.speech = bool(decisions[-1])
+        return self.speech
+
+
+class EnergyVAD(BlockVAD):
+    def __init__(self, threshold_db: float = 9, min_energy_db: float = -60, adaptation: float = 0.05, **kwargs):
+        """
+        Compares the block energy with an adaptive noise floor.
+        The floor follows the energy of non-speech blocks and drops immediately to a quieter block.
+
+        :param threshold_db: Excess of the energy over the noise floor required for the speech, dB
+        :param min_energy_db: Minimal energy of the speech, dBFS
+        :param adaptation: Rate at which the floor follows the non-speech energy, from 0 to 1
+        :param kwargs: Parameters of :class:`BlockVAD`
+        """
+        super().__init__(**kwargs)
+        self.ratio = 10 ** (threshold_db / 10)
+        self.min_energy = 10 ** (min_energy_db / 10)
+        self.adaptation = adaptation
+        self.noise_floor: float | None = None
+
+    def classify(self, blocks: np.ndarray, sample_rate: int) -> np.ndarray:
+        energy = np.mean(blocks * blocks, axis=1)
+        lowest = max(float(energy.min()), 1e-12)
+        floor = lowest if self.noise_floor is None else min(self.noise_floor, lowest)
+        speech = (energy > floor * self.ratio) & (energy > self.min_energy)
+        quiet = energy[~speech]
+        if len(quiet) > 0:
+            floor += self.adaptation * (float(quiet.mean()) - floor)
+        self.noise_floor = floor
+        return speech
+
+
+class ZeroCrossingVAD(BlockVAD):
+    def __init__(self, max_crossings: float = 5000, min_energy_db: float = -50, **kwargs):
+        """
+        Voiced speech is loud and crosses zero rarely, while broadband noise crosses it often.
+
+        :param max_crossings: Maximal zero crossing rate of the speech, crossings per second
+        :param min_energy_db: Minimal energy of the speech, dBFS
+        :param kwargs: Parameters of :class:`BlockVAD`
+        """
+        super().__init__(**kwargs)
+        self.max_crossings = max_crossings
+        self.min_energy = 10 ** (min_energy_db / 10)
+
+    def classify(self, blocks: np.ndarray, sample_rate: int) -> np.ndarray:
+        energy = np.mean(blocks * blocks, axis=1)
+        signs = np.signbit(blocks)
+        crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) * (sample_rate / blocks.shape[1])
+        return (energy > self.min_energy) & (crossings < self.max_crossings)
+
+
+class SpectralFlatnessVAD(BlockVAD):
+    def __init__(self, max_flatness: float = 0.3, min_energy_db: float = -50, band: tuple = (100, 4000),
+                 block_length: float = 0.02, **kwargs):
+        """
+        Speech has a peaky spectrum, while the spectrum of noise is flat.
+        Flatness is the ratio of the geometric and arithmetic means of the power spectrum in the band.
+
+        :param max_flatness: Maximal flatness of the speech, from 0 to 1 (about 0.56 for white noise)
+        :param min_energy_db: Minimal energy of the speech, dBFS
+        :param band: Frequency band of the speech, Hz
+        :param block_length: Length of a block, seconds
+        :param kwargs: Parameters of :class:`BlockVAD`
+        """
+        super().__init__(block_length=block_length, **kwargs)
+        self.max_flatness = max_flatness
+        self.min_energy = 10 ** (min_energy_db / 10)
+        self.band = band
+        self._window: np.ndarray | None = None
+        self._mask: np.ndarray | None = None
+
+    def classify(self, blocks: np.ndarray, sample_rate: int) -> np.ndarray:
+        size = blocks.shape[1]
+        if self._window is None or len(self._window) != size:
+            self._window = np.hanning(size).astype(np.float32)
+            freqs = np.fft.rfftfreq(size, 1 / sample_rate)
+            self._mask = (freqs >= self.band[0]) & (freqs <= self.band[1])
+
+        energy = np.mean(blocks * blocks, axis=1)
+        power = np.abs(np.fft.rfft(blocks * self._window, axis=1)[:, self._mask]) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return (energy > self.min_energy) & (flatness < self.max_flatness)
+
+
+detectors = {
+    'amplitude': AmplitudeVAD,
+    'energy': EnergyVAD,
+    'zcr': ZeroCrossingVAD,
+    'flatness': SpectralFlatnessVAD,
+}
+
+
+def create_detector(name: str, **kwargs) -> VoiceActivityDetector:
+    """
+    :param name: Name of the detector (one of ``detectors``)
+    :param kwargs: Parameters of the detector
+    :return: A new detector
+    """
+    if name not in detectors:
+        raise ValueError(f'Unknown detector {name}, available detectors: {list(detectors)}')
+    return detectors[name](**kwargs)
@@ -1 +1,2 @@
-from .vosk_consumer import VoskVoiceConsumer
\ No newline at end of file
+from .vosk_consumer import VoskVoiceConsumer
+from .pool import RecognitionStream, VoskPool, get_default_pool
\ No newline at end of file
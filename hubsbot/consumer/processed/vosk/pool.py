@@ -0,0 +1,509 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import chain, count
+from typing import Deque, Dict, Hashable, List, NamedTuple, Set
+
+from aioprocessing import AioProcess, AioPipe
+
+from hubsbot.consumer.processed.ring import RingReader, RingRef, SharedRingBuffer
+
+try:
+    # buffers have to be made by the FFI instance of vosk to be accepted by its functions
+    from vosk import _ffi
+except ImportError:
+    _ffi = None
+
+
+def _join(texts: List[str]) -> str:
+    return ' '.join(t for t in texts if len(t) > 0)
+
+
+def _accept_waveform(rec, pcm: bytes | RingRef, reader: RingReader) -> bool:
+    if not isinstance(pcm, RingRef):
+        return rec.AcceptWaveform(pcm)
+    with reader.view(pcm) as view:
+        if _ffi is not None:
+            try:
+                # vosk passes the buffer to C as is, so the samples are read right from the shared memory
+                with _ffi.from_buffer(view) as buf:
+                    return rec.AcceptWaveform(buf)
+            except TypeError:
+                pass  # the buffer is not accepted by this version of vosk
+        return rec.AcceptWaveform(bytes(view))
+
+
+def vosk_worker(conn, lang: str | None, model_path: str | None):
+    """
+    Body of a worker process. Loads the model once and serves requests of the pool until ``None`` is received:
+
+    * ``('phrase', framerate, pcm)`` recognizes the whole phrase;
+    * ``('feed', stream_id, framerate, pcm)`` feeds the next chunk of the stream and returns the partial result;
+    * ``('end', stream_id)`` finishes the stream and returns its final result.
+
+    Samples (``pcm``) are either bytes or a :class:`RingRef` to a shared ring buffer.
+    ``'ready'`` is sent once the model is loaded, or ``{'error': reason}`` if it can not be loaded.
+    """
+    from vosk import Model, KaldiRecognizer
+
+    try:
+        model = Model(model_path=model_path, lang=lang)
+    except Exception as err:
+        conn.send({'error': str(err)})
+        return
+    conn.send('ready')
+    recognizers = {}  # recognizers of whole phrases by framerate
+    streams = {}  # recognizers and finalized texts of open streams by id
+    reader = RingReader()
+
+    def create_recognizer(framerate: int) -> KaldiRecognizer:
+        rec = KaldiRecognizer(model, framerate)
+        rec.SetWords(True)
+        rec.SetPartialWords(True)
+        return rec
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            reader.close()
+            break
+        try:
+            if msg[0] == 'phrase':
+                _, framerate, pcm = msg
+                rec = recognizers.get(framerate)
+                if rec is None:
+                    rec = recognizers[framerate] = create_recognizer(framerate)
+                _accept_waveform(rec, pcm, reader)
+                # FinalResult also resets the recognizer for the next phrase
+                conn.send(json.loads(rec.FinalResult()))
+            elif msg[0] == 'feed':
+                _, id, framerate, pcm = msg
+                if id not in streams:
+                    streams[id] = (create_recognizer(framerate), [])
+                rec, texts = streams[id]
+                partial = ''
+                if _accept_waveform(rec, pcm, reader):
+                    # an endpoint was detected, the text up to it is final
+                    texts.append(json.loads(rec.Result())['text'])
+                else:
+                    partial = json.loads(rec.PartialResult())['partial']
+                conn.send({'partial': _join(texts + [partial])})
+            elif msg[0] == 'end':
+                rec, texts = streams.pop(msg[1], (None, []))
+                if rec is not None:
+                    texts.append(json.loads(rec.FinalResult())['text'])
+                conn.send({'text': _join(texts)})
+        except Exception as err:
+            conn.send({'error': str(err)})
+
+
+@dataclass
+class PoolStats:
+    submitted: int = 0  # number of submitted jobs (phrases and chunks of streams)
+    completed: int = 0
+    failed: int = 0
+    max_depth: int = 0  # the biggest observed number of queued jobs
+    total_wait: float = 0  # total time jobs spent in the queue, seconds
+    max_wait: float = 0
+    total_latency: float = 0  # total time from submitting to the result, seconds
+    max_latency: float = 0
+    piped: int = 0  # number of jobs which samples were sent through the pipe since the ring buffer was full
+    restarts: int = 0  # number of workers respawned after a crash
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.completed if self.completed > 0 else 0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.completed if self.completed > 0 else 0
+
+
+class _Job(NamedTuple):
+    msg: tuple
+    submitted: float  # time of submitting
+    fut: asyncio.Future
+    ring: SharedRingBuffer | None  # ring buffer holding the samples
+    key: Hashable
+    pinned: bool  # whether the job is a chunk of a stream pinned to a worker
+    attempts: int = 0  # number of workers which died on the job
+
+
+class RecognitionStream:
+    def __init__(self, pool: 'VoskPool', worker: int, id: int, framerate: int, key: Hashable | None = None):
+        """
+        Incremental recognition of a single phrase, which is pinned to a worker of the pool.
+        Created by :meth:`VoskPool.open_stream`.
+        """
+        self.pool = pool
+        self.worker = worker
+        self.id = id
+        self.framerate = framerate
+        self.key = key if key is not None else self
+        self.finished = False
+
+    def feed(self, pcm: bytes) -> asyncio.Future:
+        """
+        Feeds the next chunk of the phrase. Chunks are recognized in order.
+
+        :param pcm: Mono int16 samples
+        :return: Future of the partial result, ``{'partial': text}``
+        """
+        return self.pool._submit_pinned(self.worker, ('feed', self.id, self.framerate), pcm, self.key)
+
+    async def finish(self) -> dict:
+        """
+        Finishes the phrase.
+
+        :return: Final result, ``{'text': text}``
+        """
+        if self.finished:
+            raise RuntimeError('The stream is already finished')
+        return await self._end()
+
+    def abort(self):
+        """
+        Drops the phrase without waiting for the result. Does nothing if the stream is finished.
+        """
+        if self.finished or not self.pool.running:
+            return
+        # the result is not needed, but the worker has to forget the recognizer
+        self._end().add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+
+    def _end(self) -> asyncio.Future:
+        self.finished = True
+        self.pool._stream_counts[self.worker] -= 1
+        return self.pool._submit_pinned(self.worker, ('end', self.id))
+
+
+class VoskPool:
+    def __init__(self, workers: int | None = None, lang: str | None = 'ru', model_path: str | None = None,
+                 ring_size: int = 4 * 2 ** 20):
+        """
+        Pool of speech recognition processes shared by all consumers.
+        Every worker loads the model once and recognizes phrases of any consumer.
+
+        Phrases are queued per consumer, and the consumers with queued phrases are served in round-robin order,
+        so a single talkative peer can not delay the others for more than one phrase per worker.
+
+        Streams (see :meth:`open_stream`) are pinned to a worker, which keeps the recognizer state between chunks.
+        Chunks of streams are served before the queued phrases, since they are waited for in real time.
+
+        Samples are passed to the workers through a shared memory ring buffer of every source, so only their location
+        is sent through the pipe. Samples which do not fit into the ring are sent through the pipe.
+
+        A worker which dies is respawned, and its job is queued again unless the job has already killed a worker.
+        A worker which can not load the model is taken out of rotation.
+
+        :param workers: Number of worker processes, defaults to the number of CPU cores
+        :param lang: Language of the model
+        :param model_path: Path to the model, overrides ``lang``
+        :param ring_size: Size of the ring buffer of a source, bytes. 0 disables the ring buffers.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.lang = lang
+        self.model_path = model_path
+        self.ring_size = ring_size
+        self.stats = PoolStats()
+        self.busy = 0  # number of workers recognizing a phrase
+        self._queues: Dict[Hashable, Deque[_Job]] = {}
+        self._ready: Deque[Hashable] = deque()  # consumers with queued phrases in the order of serving
+        self._pinned: List[Deque[_Job]] = []  # jobs of the streams by worker
+        self._alive: List[bool] = []  # whether the worker is in rotation
+        self._stream_counts: List[int] = []  # number of open streams by worker
+        self._stream_ids = count(1)
+        self._wakeups: List[asyncio.Event] = []
+        self._rings: Dict[Hashable, SharedRingBuffer] = {}
+        self._retired: Set[SharedRingBuffer] = set()  # rings of forgotten sources with unread chunks
+        self._processes: List[AioProcess | None] = []
+        self._conns: list = []
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return len(self._tasks) > 0
+
+    @property
+    def depth(self) -> int:
+        """Number of queued jobs."""
+        return sum(map(len, self._queues.values())) + sum(map(len, self._pinned))
+
+    def start(self):
+        if self.running:
+            return
+        self._pinned = [deque() for _ in range(self.workers)]
+        self._stream_counts = [0] * self.workers
+        self._wakeups = [asyncio.Event() for _ in range(self.workers)]
+        self._alive = [True] * self.workers
+        self._processes = [None] * self.workers
+        self._conns = [None] * self.workers
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._serve(i)))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for conn in self._conns:
+            if conn is None:
+                continue
+            try:
+                conn.send(None)
+            except OSError:
+                pass  # the worker is already dead
+        for process in self._processes:
+            if process is not None:
+                await process.coro_join()
+        self._tasks.clear()
+        self._conns.clear()
+        self._processes.clear()
+        for queue in chain(self._queues.values(), self._pinned):
+            for job in queue:
+                job.fut.cancel()
+        self._queues.clear()
+        self._ready.clear()
+        self._pinned.clear()
+        for ring in chain(self._rings.values(), self._retired):
+            ring.close()
+        self._rings.clear()
+        self._retired.clear()
+
+    def forget(self, key: Hashable):
+        """
+        Releases the resources of the source, which is not going to submit anything anymore.
+        """
+        ring = self._rings.pop(key, None)
+        if ring is None:
+            return
+        if ring.pending == 0:
+            ring.close()
+        else:
+            ring.closing = True
+            self._retired.add(ring)
+
+    async def recognize(self, key: Hashable, pcm: bytes, framerate: int) -> dict:
+        """
+        Recognizes the phrase. The pool is started on the first call.
+
+        :param key: Key of the phrase source (e.g. the consumer), phrases of the same source are recognized in order
+        :param pcm: Mono int16 samples
+        :param framerate: Sample rate
+        :return: Vosk result
+        """
+        self.start()
+        if not any(self._alive):
+            raise RuntimeError('No recognition workers are running')
+        fut = asyncio.get_running_loop().create_future()
+        self._enqueue(self._job(('phrase', framerate), pcm, key, fut))
+        return await fut
+
+    def open_stream(self, framerate: int, key: Hashable | None = None) -> RecognitionStream:
+        """
+        Opens a stream of incremental recognition on the least loaded worker. The pool is started on the first call.
+
+        :param framerate: Sample rate
+        :param key: Key of the source, which ring buffer is used. Defaults to the stream itself.
+        """
+        self.start()
+        alive = [i for i in range(self.workers) if self._alive[i]]
+        if len(alive) == 0:
+            raise RuntimeError('No recognition workers are running')
+        worker = min(alive, key=self._stream_counts.__getitem__)
+        self._stream_counts[worker] += 1
+        return RecognitionStream(self, worker, next(self._stream_ids), framerate, key)
+
+    def _submit_pinned(self, worker: int, msg: tuple, pcm: bytes | None = None, key: Hashable | None = None) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        job = self._job(msg, pcm, key, fut, pinned=True)
+        if not self._alive[worker]:
+            self._fail(job, 'the worker is not running')
+            return fut
+        self._pinned[worker].append(job)
+        self._wakeups[worker].set()
+        return fut
+
+    def _job(self, msg: tuple, pcm: bytes | None, key: Hashable, fut: asyncio.Future, pinned: bool = False) -> _Job:
+        self.stats.submitted += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.depth + 1)
+        if pcm is None:
+            return _Job(msg, time.perf_counter(), fut, None, key, pinned)
+        if self.ring_size == 0 or len(pcm) == 0:
+            return _Job(msg + (pcm,), time.perf_counter(), fut, None, key, pinned)
+
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = SharedRingBuffer(self.ring_size)
+        ref = ring.write(pcm)
+        if ref is None:
+            self.stats.piped += 1
+            return _Job(msg + (pcm,), time.perf_counter(), fut, None, key, pinned)
+        return _Job(msg + (ref,), time.perf_counter(), fut, ring, key, pinned)
+
+    def _enqueue(self, job: _Job, front: bool = False):
+        """
+        Queues the phrase job of the source, at the front of the queue if it is queued again.
+        """
+        queue = self._queues.get(job.key)
+        if queue is None:
+            queue = self._queues[job.key] = deque()
+            if front:
+                self._ready.appendleft(job.key)
+            else:
+                self._ready.append(job.key)
+        if front:
+            queue.appendleft(job)
+        else:
+            queue.append(job)
+        for wakeup in self._wakeups:
+            wakeup.set()
+
+    def _release(self, job: _Job):
+        """
+        Releases the samples of the job in the ring buffer.
+        """
+        ring = job.ring
+        if ring is None:
+            return
+        ring.release(job.msg[-1])
+        if ring.closing and ring.pending == 0:
+            ring.close()
+            self._retired.discard(ring)
+
+    def _fail(self, job: _Job, reason: str):
+        self._release(job)
+        self.stats.failed += 1
+        if not job.fut.done():
+            job.fut.set_exception(RuntimeError(f'Recognition failed: {reason}'))
+
+    async def _spawn(self, worker: int):
+        """
+        Starts the worker process and waits until it loads the model.
+
+        :return: Connection to the worker, or None if it failed to start
+        """
+        conn1, conn2 = AioPipe(True)
+        process = AioProcess(target=vosk_worker, args=(conn1, self.lang, self.model_path), daemon=True)
+        process.start()
+        # only the worker holds its end, so its death is seen as EOF
+        conn1.close()
+        self._processes[worker] = process
+        self._conns[worker] = conn2
+        try:
+            ready = await conn2.coro_recv()
+        except (EOFError, OSError):
+            await process.coro_join()
+            ready = {'error': f'the process exited with code {process.exitcode}'}
+        if ready == 'ready':
+            return conn2
+        logging.error(f'Recognition worker {worker} failed to start: {ready["error"]}')
+        self._retire(worker)
+        return None
+
+    def _retire(self, worker: int):
+        """
+        Takes the worker out of rotation and fails the jobs which can not be served anymore.
+        """
+        self._alive[worker] = False
+        self._conns[worker] = None
+        pinned = self._pinned[worker]
+        while len(pinned) > 0:
+            self._fail(pinned.popleft(), 'the worker is not running')
+        if not any(self._alive):
+            for queue in self._queues.values():
+                for job in queue:
+                    self._fail(job, 'no recognition workers are running')
+            self._queues.clear()
+            self._ready.clear()
+
+    def _requeue(self, worker: int, job: _Job):
+        """
+        Queues the job of a dead worker again, or fails it if it has already killed a worker.
+        Streams lose the recognizer state with the worker, so the text before the job is lost.
+        """
+        if job.attempts > 0:
+            self._fail(job, 'the worker died')
+            return
+        job = job._replace(attempts=job.attempts + 1)
+        if job.pinned:
+            self._pinned[worker].appendleft(job)
+        else:
+            self._enqueue(job, front=True)
+
+    async def _next_job(self, worker: int) -> tuple:
+        while True:
+            pinned = self._pinned[worker]
+            if len(pinned) > 0:
+                return pinned.popleft()
+            if len(self._ready) > 0:
+                break
+            self._wakeups[worker].clear()
+            await self._wakeups[worker].wait()
+
+        key = self._ready.popleft()
+        queue = self._queues[key]
+        job = queue.popleft()
+        if len(queue) > 0:
+            self._ready.append(key)
+        else:
+            del self._queues[key]
+        return job
+
+    async def _serve(self, worker: int):
+        conn = await self._spawn(worker)
+        while conn is not None:
+            job = await self._next_job(worker)
+            fut, submitted = job.fut, job.submitted
+            if fut.cancelled():
+                self._release(job)
+                continue
+            started = time.perf_counter()
+            self.busy += 1
+            try:
+                await conn.coro_send(job.msg)
+                res = await conn.coro_recv()
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except (EOFError, OSError) as err:
+                res = None
+                logging.error(f'Recognition worker {worker} died: {err!r}')
+            except Exception as err:
+                logging.error(f'Caught exception in the recognition worker: {err}')
+                res = {'error': str(err)}
+            finally:
+                self.busy -= 1
+
+            if res is None:
+                self._requeue(worker, job)
+                await self._processes[worker].coro_join()
+                self.stats.restarts += 1
+                conn = await self._spawn(worker)
+                continue
+            self._release(job)
+            if fut.done():
+                continue
+            if 'error' in res:
+                self.stats.failed += 1
+                fut.set_exception(RuntimeError(f'Recognition failed: {res["error"]}'))
+                continue
+            finished = time.perf_counter()
+            self.stats.completed += 1
+            self.stats.total_wait += started - submitted
+            self.stats.max_wait = max(self.stats.max_wait, started - submitted)
+            self.stats.total_latency += finished - submitted
+            self.stats.max_latency = max(self.stats.max_latency, finished - submitted)
+            fut.set_result(res)
+
+
+_default_pool: VoskPool | None = None
+
+
+def get_default_pool() -> VoskPool:
+    """Get the pool shared by the consumers which were not given a pool explicitly."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = VoskPool()
+    return _default_pool
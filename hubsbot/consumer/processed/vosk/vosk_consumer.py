@@ -1,16 +1,16 @@
-import json
+import asyncio
+import logging
 from typing import List
 from aiortc import MediaStreamTrack
 from av import AudioFrame
-from pydub import AudioSegment
-import io
 import itertools
-from aioprocessing import AioProcess, AioPipe
-
-from vosk import Model, KaldiRecognizer
+import numpy as np
 
 from hubsbot.consumer import Message, TextConsumer
 from hubsbot.consumer.processed.phrases_consumer import PhrasesVoiceConsumer
+from hubsbot.consumer.processed.audio import PolyphaseResampler, frames_to_pcm16
+from hubsbot.consumer.processed.vad import get_frame_time
+from .pool import RecognitionStream, VoskPool, get_default_pool
 
 
 def batched(x, n):
@@ -19,56 +19,109 @@ def batched(x, n):
         yield batch
 
 
-def vosk_server(conn, model: Model, framerate: int):
-    """
-    This function is intended to be called in a separate thread (process actually) to allow non-blocking speech recognition.
-    """
-    rec = KaldiRecognizer(model, framerate)
-    rec.SetWords(True)
-    rec.SetPartialWords(True)
-
-    stop = False
-    while not stop:
-        msg = conn.recv()
-        if isinstance(msg, bool):
-            stop = msg
-        else:
-            rec.AcceptWaveform(msg)
-            ret = json.loads(rec.FinalResult())
-            conn.send(ret)
-
-
 class VoskVoiceConsumer(PhrasesVoiceConsumer, TextConsumer):
-    def __init__(self, track: MediaStreamTrack):
-        super().__init__(track)
-        self.model = Model(lang='ru')
-        self.framerate = 48000
-        conn1, conn2 = AioPipe(True)
-        self.vosk_process = AioProcess(target=vosk_server, args=(conn1, self.model, self.framerate))
-        self.vosk_process.start()
-        self.conn = conn2
+    def __init__(self, track: MediaStreamTrack, pool: VoskPool | None = None, streaming: bool = False,
+                 chunk_length: float = 0.2, sample_rate: int = 16000, pad: float = 0.2, **kwargs):
+        """
+        :param track: The input track
+        :param pool: Recognition pool, defaults to the pool shared by all consumers
+        :param streaming: Feed phrases to the recognizer while they are spoken and report partial results
+            to :meth:`on_partial`. Otherwise, every phrase is recognized after it ends.
+        :param chunk_length: Length of the chunks fed to the recognizer in the streaming mode, seconds
+        :param sample_rate: Sample rate the input is converted to, should match the model (16 kHz for most of them)
+        :param pad: Length of the silence added to both ends of a phrase, seconds. Not used in the streaming mode.
+        :param kwargs: Parameters of :class:`PhrasesVoiceConsumer`, e.g. ``vad``
+        """
+        super().__init__(track, **kwargs)
+        self.pool = pool or get_default_pool()
+        self.framerate = sample_rate
+        self.pad = pad
+        self.streaming = streaming
+        self.chunk_length = chunk_length
+        self._stream: RecognitionStream | None = None
+        self._chunk: List[AudioFrame] = []
+        self._chunk_time = 0.0
+        self._resampler: PolyphaseResampler | None = None
+        self._partial: asyncio.Task | None = None
+
+    async def start(self):
+        try:
+            await super().start()
+        finally:
+            # the track may end in the middle of a phrase
+            if self._stream is not None:
+                self._stream.abort()
+                self._stream = None
+            if self._partial is not None:
+                self._partial.cancel()
+                self._partial = None
+            self._chunk, self._chunk_time = [], 0.0
+            self.pool.forget(self)
 
     async def on_message(self, msg: Message):
         pass
 
-    async def on_phrase(self, frames: List[AudioFrame]):
-        segment = AudioSegment.empty()
-        for frame in frames:
-            raw = frame.to_ndarray().tobytes()
-            s = io.BytesIO(raw)
-            segment = segment + AudioSegment.from_raw(s, sample_width=frame.format.bytes,
-                                                      channels=len(frame.layout.channels), frame_rate=frame.sample_rate)
+    async def on_partial(self, msg: Message):
+        """
+        Receives the hypothesis of the current phrase while it is spoken. Called only in the streaming mode.
+        The final text is passed to :meth:`on_message` when the phrase ends.
+        """
+        pass
 
-        silence = AudioSegment.silent(2000, self.framerate)
-        segment = silence + segment + silence
-        segment = segment.set_frame_rate(self.framerate)
-        segment = segment.set_channels(1)
-        await self.conn.coro_send(segment.raw_data)
+    async def on_phrase_begin(self):
+        if self.streaming:
+            self._stream = self.pool.open_stream(self.framerate, self)
+            self._resampler = None
 
-        res = (await self.conn.coro_recv())['text']
-        await self.on_message(Message(body=res))
+    async def on_phrase_frame(self, frame: AudioFrame):
+        if self._stream is None:
+            return
+        self._chunk.append(frame)
+        self._chunk_time += get_frame_time(frame)
+        if self._chunk_time >= self.chunk_length:
+            self._feed(self._stream)
+
+    def _feed(self, stream: RecognitionStream):
+        if self._resampler is None and self._chunk[0].sample_rate != self.framerate:
+            # chunks of a phrase are resampled as a continuous signal
+            self._resampler = PolyphaseResampler(self._chunk[0].sample_rate, self.framerate)
+        pcm = frames_to_pcm16(self._chunk, self.framerate, resampler=self._resampler)
+        self._chunk, self._chunk_time = [], 0.0
+        self._submit(stream, pcm)
+
+    def _submit(self, stream: RecognitionStream, pcm: np.ndarray):
+        # the frames loop is not blocked by the recognition, partials are delivered by a chain of tasks
+        self._partial = asyncio.create_task(self._deliver_partial(stream.feed(pcm.tobytes()), self._partial))
+
+    async def _deliver_partial(self, result: asyncio.Future, previous: asyncio.Task | None):
+        # errors are logged here, so that a failed partial does not break the chain
+        if previous is not None:
+            await previous
+        try:
+            text = (await result)['partial']
+        except Exception as err:
+            logging.error(f'Caught exception while recognizing a chunk: {err}')
+            return
+        if len(text) > 0:
+            try:
+                await self.on_partial(Message(body=text))
+            except Exception as err:
+                logging.error(f'Caught exception in on_partial: {err}')
 
-    async def stop(self):
-        await self.conn.coro_send(False)
-        await self.vosk_process.coro_join()
-        await self.vosk_process.close()
+    async def on_phrase(self, frames: List[AudioFrame]):
+        if self._stream is not None:
+            stream, self._stream = self._stream, None
+            if len(self._chunk) > 0:
+                self._feed(stream)
+            if self._resampler is not None:
+                # the end of the phrase is held back by the resampling filter
+                self._submit(stream, self._resampler.flush())
+            res = (await stream.finish())['text']
+            if self._partial is not None:
+                # partials are not reported after the final text
+                await self._partial
+                self._partial = None
+        else:
+            pcm = frames_to_pcm16(frames, self.framerate, pad=self.pad)
+            res = (await self.pool.recognize(self, pcm.tobytes(), self.framerate))['text']
+        await self.on_message(Message(body=res))
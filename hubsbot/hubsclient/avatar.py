@@ -55,8 +55,11 @@ class Avatar(NAF):
     righthand: HandTransform = field(default_factory=HandTransform)
     head_transform: Transform = field(default_factory=lambda: Transform(position=Vector3(0, 1.6, 0)))
 
-    @property
-    def components(self) -> list:
+    # Components are kept as a pre-built list of dicts, which is patched in place when the avatar changes
+    components_cache: list | None = field(default=None, repr=False, compare=False)
+    dirty: set = field(default_factory=set, repr=False, compare=False)  # indices of components changed since sent
+
+    def _build_components(self) -> list:
         return [
             self.position.to_obj(),
             self.rotation.to_obj(),
@@ -78,28 +81,108 @@ class Avatar(NAF):
             self.righthand.visible,
         ]
 
+    @property
+    def components(self) -> list:
+        c = self.components_cache
+        if c is None:
+            c = self.components_cache = self._build_components()
+            self.dirty.update(range(len(c)))
+            return c
+
+        dirty = self.dirty
+        for i, v in (
+            (0, self.position),
+            (1, self.rotation),
+            (2, self.scale),
+            (5, self.head_transform.position),
+            (6, self.head_transform.rotation),
+            (7, self.lefthand.position),
+            (8, self.lefthand.rotation),
+            (10, self.righthand.position),
+            (11, self.righthand.rotation),
+        ):
+            d = c[i]
+            x, y, z = v.array.tolist()
+            if d["x"] != x or d["y"] != y or d["z"] != z:
+                d["x"], d["y"], d["z"] = x, y, z
+                dirty.add(i)
+
+        d = c[3]
+        if (
+            d["avatarSrc"] != self.avatar_url
+            or d["avatarType"] != self.avatar_type.value
+            or d["muted"] != self.muted
+            or d["isSharingAvatarCamera"] != self.sharing_avatar_camera
+        ):
+            d["avatarSrc"] = self.avatar_url
+            d["avatarType"] = self.avatar_type.value
+            d["muted"] = self.muted
+            d["isSharingAvatarCamera"] = self.sharing_avatar_camera
+            dirty.add(3)
+
+        d = c[4]
+        if d["left_hand_pose"] != self.lefthand.pose.value or d["right_hand_pose"] != self.righthand.pose.value:
+            d["left_hand_pose"] = self.lefthand.pose.value
+            d["right_hand_pose"] = self.righthand.pose.value
+            dirty.add(4)
+
+        if c[9] != self.lefthand.visible:
+            c[9] = self.lefthand.visible
+            dirty.add(9)
+        if c[12] != self.righthand.visible:
+            c[12] = self.righthand.visible
+            dirty.add(12)
+        return c
+
+    def changed_components(self) -> dict:
+        components = self.components
+        if self.sent_components is None:
+            return {str(i): c for i, c in enumerate(components)}
+        return {str(i): components[i] for i in sorted(self.dirty)}
+
+    def mark_sent(self, components: list):
+        # changes are tracked by ``dirty``, so the components are not copied, only the fact of the sync is remembered
+        self.sent_components = components
+        self.dirty.clear()
+
     @components.setter
     def components(self, value):
         if value == [] or value is None:
             return
         (
-            self.position,
-            self.rotation,
-            self.scale,
+            position,
+            rotation,
+            scale,
             avatarinfo,
             handposes,
-            self.head_transform.position,
-            self.head_transform.rotation,
-            self.lefthand.position,
-            self.lefthand.rotation,
-            self.lefthand.visible,
-            self.righthand.position,
-            self.righthand.rotation,
-            self.righthand.visible,
+            head_position,
+            head_rotation,
+            lefthand_position,
+            lefthand_rotation,
+            lefthand_visible,
+            righthand_position,
+            righthand_rotation,
+            righthand_visible,
         ) = value
-        self.avatar_url = avatarinfo["avatarSrc"]
-        self.avatar_type = avatarinfo["avatarType"]
-        self.muted = avatarinfo["muted"]
-        self.sharing_avatar_camera = avatarinfo["isSharingAvatarCamera"]
-        self.lefthand.pose = handposes["left_hand_pose"]
-        self.righthand.pose = handposes["right_hand_pose"]
+        self.assign(
+            position=position,
+            rotation=rotation,
+            scale=scale,
+            avatar_url=avatarinfo["avatarSrc"],
+            avatar_type=avatarinfo["avatarType"],
+            muted=avatarinfo["muted"],
+            sharing_avatar_camera=avatarinfo["isSharingAvatarCamera"],
+        )
+        self.head_transform.assign(position=head_position, rotation=head_rotation)
+        self.lefthand.assign(
+            position=lefthand_position,
+            rotation=lefthand_rotation,
+            visible=lefthand_visible,
+            pose=handposes["left_hand_pose"],
+        )
+        self.righthand.assign(
+            position=righthand_position,
+            rotation=righthand_rotation,
+            visible=righthand_visible,
+            pose=handposes["right_hand_pose"],
+        )
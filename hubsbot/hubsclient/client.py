@@ -1,6 +1,12 @@
+import asyncio
+import logging
+
 from websockets.client import WebSocketClientProtocol, connect as ws_connect
-import json
 from .avatar import Avatar
+from .codec import get_codec
+from .history import MessageHistory
+from .scheduler import SyncScheduler
+from .sender import Priority, SendQueue
 from .naf import NAF
 from .utils import dataclass, field
 
@@ -12,24 +18,33 @@ class MSG:
     target: str = ""
     cmd: str = ""
     data: object = field(default_factory=dict)
+    _naf: dict | None = field(default=None, init=False, repr=False, compare=False)
 
     @classmethod
-    def from_json(cls, json_str: str) -> "MSG":
+    def from_json(cls, json_str: str | bytes) -> "MSG":
         """Parse JSON message.
 
         :param json_str: JSON string
         :return: MSG
         """
-        return cls(*json.loads(json_str))
+        return cls(*get_codec().loads(json_str))
+
+    @property
+    def naf(self) -> dict:
+        """NAF payload of a "nafr" message. It is sent as a nested JSON string, which is parsed on the first access.
+
+        :return: Parsed NAF
+        """
+        if self._naf is None:
+            self._naf = get_codec().loads(self.data["naf"])
+        return self._naf
 
     def to_json(self) -> str:
         """Convert to JSON string.
 
         :return: JSON string
         """
-        return json.dumps(
-            [str(self.channel), str(self.id), self.target, self.cmd, self.data], default=lambda o: o.to_obj()
-        )
+        return get_codec().dumps([str(self.channel), str(self.id), self.target, self.cmd, self.data])
 
     __str__ = to_json
 
@@ -41,6 +56,12 @@ class HubsClient:
         room_id: str,
         avatar_id: str = None,
         display_name: str = "API Client",
+        history_capacity: int = 1024,
+        history_retention: dict[str, int] | None = None,
+        sync_rate: float | None = 15,
+        send_high_water: dict[Priority, int] | None = None,
+        heartbeat_interval: float = 15,
+        heartbeat_timeout: float | None = None,
     ):
         """Hubs room client.
 
@@ -48,10 +69,19 @@ class HubsClient:
         :param room_id: The hub room ID code
         :param avatar_id: The avatar ID
         :param display_name: The display name for the avatar
+        :param history_capacity: Number of kept received messages of each event type, see :class:`MessageHistory`
+        :param history_retention: Per-event overrides of ``history_capacity``
+        :param sync_rate: Maximal number of avatar syncs per second, see :class:`SyncScheduler`.
+            None disables rate limiting, so every :meth:`sync` is sent immediately.
+        :param send_high_water: Per-priority limits of the outbound queue, see :class:`SendQueue`
+        :param heartbeat_interval: Interval of Phoenix heartbeats, seconds
+        :param heartbeat_timeout: The socket is considered dead and is closed if nothing is received for this time.
+            Defaults to two heartbeat intervals.
         """
         self.host = host
         self.url = f"wss://{host}/socket/websocket?vsn=2.0.0"
         self.sock: WebSocketClientProtocol = None
+        self.joined = False  # whether the hub channel is joined, False while reconnecting
         self.mix: dict[int, int] = {}
         self.room_id = room_id
         self.display_name = display_name
@@ -59,42 +89,82 @@ class HubsClient:
         self.sid: str = None
         avatar_url = avatar_id if avatar_id.startswith("http") else f"https://{host}/api/v1/avatars/{avatar_id}/avatar.gltf"
         self.avatar = Avatar(avatar_url=avatar_url)
-        self.msg_buf: list[MSG] = []
+        self.history = MessageHistory(history_capacity, history_retention)
+        self.sync_scheduler = SyncScheduler(self.sync_now, sync_rate) if sync_rate else None
+        self.send_queue = SendQueue(self._send_raw, send_high_water)
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout or 2 * heartbeat_interval
+        self.last_received = 0.0  # event loop time of the last received message
+        self._heartbeat_task: asyncio.Task | None = None
+
+    @property
+    def msg_buf(self) -> list[MSG]:
+        """Received messages kept in the history."""
+        return list(self.history)
 
-    async def send_cmd(self, ch, tgt, cmd, body):
+    async def _send_raw(self, data: str):
+        await self.sock.send(data)
+
+    async def send_cmd(self, ch, tgt, cmd, body, priority: Priority = Priority.CONTROL):
         """Send a command to a channel.
 
+        Once connected, the command is put into the outbound queue, and the call only waits if the queue of the
+        priority is full.
+
         :param ch: Channel number
         :param tgt: Channel target
         :param cmd: Command
         :param body: Payload body
+        :param priority: Priority of the command in the outbound queue
+        :return: Future, which is set when the command is actually sent (None if the queue is not running).
+            None if there is no connection, the command is dropped then.
         """
+        if self.sock is None:
+            logging.debug(f"Not connected to Hubs, dropping {cmd}")
+            return None
         # increment message index
         # hack to get around null, null
         self.mix[ch] = ch and (self.mix.get(ch, ch - 1) + 1)
-        return await self.sock.send(MSG(ch, self.mix[ch], tgt, cmd, body).to_json())
+        data = MSG(ch, self.mix[ch], tgt, cmd, body).to_json()
+        if self.send_queue.running:
+            return await self.send_queue.put(data, priority)
+        return await self._send_raw(data)
 
-    def send8(self, cmd: str, body: dict):
+    def send8(self, cmd: str, body: dict, priority: Priority = Priority.CONTROL):
         """Send a command on channel 8, resource update.
 
         :param cmd: Command
         :param body: Payload body
+        :param priority: Priority of the command in the outbound queue
         """
-        return self.send_cmd(8, f"hub:{self.room_id}", cmd, body)
+        return self.send_cmd(8, f"hub:{self.room_id}", cmd, body, priority)
 
     async def send_naf(self, naf: NAF):
         """Send a NAF update.
 
         :param naf: NAF object
         """
-        return await self.send8("naf", {"dataType": "u", "data": naf.to_obj()})
+        return await self.send8("naf", {"dataType": "u", "data": naf.to_obj()}, Priority.POSE)
+
+    async def send_nafr_um(self, naf: NAF):
+        """Send only the components of NAF changed since the last sent update (compact "um" nafr).
+        Nothing is sent if nothing changed.
+
+        :param naf: NAF object
+        """
+        data = naf.to_um_obj()
+        if data is None:
+            return None
+        return await self.send8(
+            "nafr", {"naf": get_codec().dumps({"dataType": "um", "data": {"d": [data]}})}, Priority.POSE
+        )
 
     async def send_chat(self, message: str):
         """Send a chat message.
 
         :param message: Message to send
         """
-        return await self.send8("message", {"body": message, "type": "chat"})
+        return await self.send8("message", {"body": message, "type": "chat"}, Priority.CHAT)
 
     async def get_message(self) -> MSG:
         """Get a message from the socket.
@@ -103,21 +173,67 @@ class HubsClient:
         """
         try:
             msg = await self.sock.recv()
+            self.last_received = asyncio.get_running_loop().time()
             msg = MSG.from_json(msg)
-            self.msg_buf.append(msg)
+            self.history.append(msg)
             return msg
         except TimeoutError:
             return None
 
+    @property
+    def pending_messages(self) -> int:
+        """Number of frames already received by the socket but not yet read."""
+        return len(getattr(self.sock, "messages", ()))
+
+    async def get_messages(self, max_count: int = 256) -> list[MSG]:
+        """Wait for a message and drain everything else that is already available.
+
+        :param max_count: Maximal number of messages to return at once
+        :return: List of MSG
+        """
+        msgs = [await self.get_message()]
+        while len(msgs) < max_count and self.pending_messages > 0:
+            msgs.append(await self.get_message())
+        return [msg for msg in msgs if msg is not None]
+
     async def sync(self):
-        return await self.send_naf(self.avatar)
+        """Request sending of the avatar state.
+        If the sync rate is limited, the request is coalesced with other ones and sent on the next scheduler tick.
+        Nothing is sent until the hub is joined, the full state is sent on joining anyway.
+        """
+        if not self.joined:
+            return None
+        if self.sync_scheduler is not None and self.sync_scheduler.running:
+            return self.sync_scheduler.request()
+        return await self.sync_now()
+
+    async def sync_now(self):
+        """Send the avatar state. The full NAF is sent on the first sync, later only the changes are sent."""
+        if self.avatar.is_first_sync:
+            return await self.send_naf(self.avatar)
+        return await self.send_nafr_um(self.avatar)
 
     async def send_heartbeat(self):
         """Send a heartbeat."""
         return await self.send_cmd(None, "phoenix", "heartbeat", {})
 
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if loop.time() - self.last_received > self.heartbeat_timeout:
+                logging.warning("Nothing received from the Hubs socket for too long, closing it")
+                # a graceful close would wait for the closing handshake of a dead peer;
+                # the reader gets ConnectionClosed and may reconnect
+                self.sock.transport.abort()
+                return
+            await self.send_heartbeat()
+
     async def join(self):
         self.sock = await ws_connect(self.url)
+        self.last_received = asyncio.get_running_loop().time()
+        self.send_queue.start()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
         # send first join msg
         await self.send_cmd(5, "ret", "phx_join", {"hub_id": self.room_id})
         self.sid = (await self.get_message()).data["response"]["session_id"]
@@ -151,12 +267,39 @@ class HubsClient:
             },
         )
         self.avatar.owner_id = self.sid
-        await self.sync()
+        self.joined = True
+        await self.sync_now()
+        if self.sync_scheduler is not None:
+            self.sync_scheduler.start()
+
+    async def _disconnect(self):
+        self.joined = False
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self.sync_scheduler is not None:
+            await self.sync_scheduler.stop()
+        await self.send_queue.stop()
+        if self.sock is not None:
+            try:
+                await self.sock.close()
+            except Exception as err:
+                logging.debug(f"Caught exception while closing the Hubs socket: {err}")
+        self.sock = None
+        self.mix = {}
+
+    async def reconnect(self):
+        """Reconnect and rejoin the hub channel.
+
+        The session id (``sid``) is assigned anew by the server, and the avatar is fully synced again.
+        Messages which were not sent before the reconnection are discarded.
+        """
+        await self._disconnect()
+        self.avatar.is_first_sync = True
+        await self.join()
 
     async def close(self):
         """Close the connection."""
-        await self.sock.close()
-        self.sock = None
+        await self._disconnect()
         self.sid = None
-        self.msg_buf = []
-        self.mix = {}
+        self.history.clear()
@@ -0,0 +1,67 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_obj(o):
+    """``default`` hook for the JSON encoders: serializes NAF objects and numpy scalars."""
+    if hasattr(o, "to_obj"):
+        return o.to_obj()
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """JSON codec based on the standard library."""
+
+    name = "json"
+
+    def loads(self, s: str | bytes):
+        return json.loads(s)
+
+    def dumps(self, obj) -> str:
+        return json.dumps(obj, default=to_obj)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec based on orjson (``pip install orjson``)."""
+
+    name = "orjson"
+
+    def loads(self, s: str | bytes):
+        return orjson.loads(s)
+
+    def dumps(self, obj) -> str:
+        # Phoenix expects text frames, so the result is decoded back to str.
+        # Dataclasses are passed to ``to_obj`` as well, otherwise orjson dumps their fields as is.
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATACLASS
+        return orjson.dumps(obj, default=to_obj, option=option).decode("utf-8")
+
+
+codecs = {JSONCodec.name: JSONCodec}
+if orjson is not None:
+    codecs[OrjsonCodec.name] = OrjsonCodec
+
+_codec: JSONCodec = OrjsonCodec() if orjson is not None else JSONCodec()
+
+
+def get_codec() -> JSONCodec:
+    """Get the codec used to encode and decode Hubs messages."""
+    return _codec
+
+
+def set_codec(codec: str | JSONCodec):
+    """Set the codec used to encode and decode Hubs messages.
+
+    :param codec: Name of the codec (one of ``codecs``) or a codec instance
+    """
+    global _codec
+    if isinstance(codec, str):
+        if codec not in codecs:
+            raise ValueError(f"Unknown codec {codec}, available codecs: {list(codecs)}")
+        codec = codecs[codec]()
+    _codec = codec
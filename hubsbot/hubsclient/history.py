@@ -0,0 +1,105 @@
+import heapq
+import sys
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterator
+
+# Pose updates are by far the most frequent messages, and their latest state is kept by the peers anyway
+DEFAULT_RETENTION = {"naf": 0, "nafr": 0}
+
+
+def _sizeof(obj) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_sizeof(v) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _sizeof(vars(obj))
+    return size
+
+
+class MessageHistory:
+    def __init__(self, capacity: int = 1024, retention: dict[str, int] | None = None):
+        """Bounded history of received messages.
+
+        Every event type (``MSG.cmd``) has its own ring buffer, so a flood of one event does not evict the others.
+        Appending is O(1); the oldest message of the event type is discarded when its buffer is full.
+
+        :param capacity: Number of kept messages of each event type
+        :param retention: Per-event overrides of ``capacity``, 0 means that the event is not kept at all.
+            Defaults to ``DEFAULT_RETENTION``, which drops NAF updates.
+        """
+        self.capacity = capacity
+        self.retention = dict(DEFAULT_RETENTION if retention is None else retention)
+        self.dropped = 0  # number of messages not kept due to the zero retention
+        self._buffers: dict[str, deque] = {}
+        self._seq = 0
+
+    def set_retention(self, cmd: str, capacity: int):
+        """Change the number of kept messages of the event type.
+
+        :param cmd: Event type
+        :param capacity: New capacity, 0 to stop keeping the event
+        """
+        self.retention[cmd] = capacity
+        buf = self._buffers.pop(cmd, None)
+        if buf is not None and capacity > 0:
+            self._buffers[cmd] = deque(buf, maxlen=capacity)
+
+    def append(self, msg):
+        """Put a message into the history.
+
+        :param msg: MSG
+        """
+        buf = self._buffers.get(msg.cmd)
+        if buf is None:
+            capacity = self.retention.get(msg.cmd, self.capacity)
+            if capacity == 0:
+                self.dropped += 1
+                return
+            buf = self._buffers[msg.cmd] = deque(maxlen=capacity)
+        self._seq += 1
+        buf.append((self._seq, msg))
+
+    def iter(self, cmd: str | None = None, predicate: Callable | None = None) -> Iterator:
+        """Iterate over the kept messages from the oldest to the newest.
+
+        :param cmd: Only messages of this event type
+        :param predicate: Only messages for which the predicate is true
+        """
+        if cmd is not None:
+            it = (msg for _, msg in self._buffers.get(cmd, ()))
+        else:
+            it = (msg for _, msg in heapq.merge(*self._buffers.values()))
+        return it if predicate is None else filter(predicate, it)
+
+    def recent(self, n: int, cmd: str | None = None, predicate: Callable | None = None) -> list:
+        """Get up to ``n`` newest messages, ordered from the oldest to the newest.
+
+        :param n: Number of messages
+        :param cmd: Only messages of this event type
+        :param predicate: Only messages for which the predicate is true
+        """
+        if cmd is not None:
+            it = (msg for _, msg in reversed(self._buffers.get(cmd, ())))
+        else:
+            it = (msg for _, msg in heapq.merge(*map(reversed, self._buffers.values()), reverse=True))
+        if predicate is not None:
+            it = filter(predicate, it)
+        res = list(islice(it, n))
+        res.reverse()
+        return res
+
+    def memory_usage(self) -> int:
+        """Approximate number of bytes occupied by the kept messages."""
+        return sum(_sizeof(buf) for buf in self._buffers.values())
+
+    def clear(self):
+        self._buffers.clear()
+
+    def __iter__(self):
+        return self.iter()
+
+    def __len__(self):
+        return sum(map(len, self._buffers.values()))
@@ -1,3 +1,4 @@
+import copy
 import time
 from .utils import typed_dataclass, field, gen_uuid
 
@@ -13,10 +14,11 @@ class NAF:
     parent: str | None = None
     components: list = field(default_factory=list)
     is_first_sync: bool = True
+    sent_components: list | None = field(default=None, repr=False, compare=False)  # components of the last sent NAF
 
-    def to_obj(self):
+    def _header(self) -> dict:
         self.last_owner_time = time.time()
-        data = {
+        return {
             "networkId": self.network_id,
             "owner": self.owner_id or self.creator_id,
             "creator": self.creator_id or self.owner_id,
@@ -24,12 +26,48 @@ class NAF:
             "template": self.template,
             "persistent": self.persistent,
             "parent": self.parent,
-            "components": self.components,
-            "isFirstSync": self.is_first_sync,
         }
+
+    def mark_sent(self, components: list):
+        """Remember the components which were sent, to find out the changes later.
+
+        A copy is kept, since the sent list is owned by the caller and may be mutated in place.
+        """
+        self.sent_components = copy.deepcopy(components)
+
+    def to_obj(self):
+        data = self._header()
+        data["components"] = self.components
+        data["isFirstSync"] = self.is_first_sync
+        self.mark_sent(data["components"])
         self.is_first_sync = False
         return data
 
+    def changed_components(self) -> dict:
+        """Components changed since the last sent NAF.
+
+        :return: Dict of changed components keyed by their (stringified) indices
+        """
+        components = self.components
+        sent = self.sent_components
+        if sent is None or len(sent) != len(components):
+            return {str(i): c for i, c in enumerate(components)}
+        return {str(i): c for i, (c, s) in enumerate(zip(components, sent)) if c != s}
+
+    def to_um_obj(self) -> dict | None:
+        """Compact form of the NAF with only changed components, which is sent in the "um" nafr.
+
+        :return: NAF with partial components, or None if nothing changed since the last sent NAF
+        """
+        changed = self.changed_components()
+        if len(changed) == 0:
+            return None
+        data = self._header()
+        data["components"] = changed
+        data["isFirstSync"] = False
+        self.mark_sent(self.components)
+        return data
+
     @classmethod
     def from_obj(cls, data):
         obj = cls(
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+
+class SyncScheduler:
+    def __init__(self, send: Callable[[], Awaitable], rate: float = 15):
+        """Rate limiter of avatar syncs.
+
+        Sync requests only mark the avatar as pending, and a background task sends at most one sync per tick.
+        Requests arriving while a sync is pending are coalesced into it, and the state is read at the sending time,
+        so the latest state is always sent.
+
+        :param send: Coroutine function sending the current state
+        :param rate: Maximal number of syncs per second
+        """
+        self.send = send
+        self.rate = rate
+        self.pending = False
+        self.requested = 0  # number of sync requests
+        self.sent = 0  # number of sent syncs
+        self.coalesced = 0  # number of requests merged into an already pending sync
+        # number of requests which are not sent by a sync of their own: the coalesced ones,
+        # and the pending one discarded on stop
+        self.dropped = 0
+        self._event: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def request(self):
+        """Request a sync of the current state."""
+        self.requested += 1
+        if self.pending:
+            # the pending state is replaced by the latest one
+            self.coalesced += 1
+            self.dropped += 1
+        self.pending = True
+        if self._event is not None:
+            self._event.set()
+
+    async def flush(self):
+        """Send the pending sync immediately."""
+        if self.pending:
+            self.pending = False
+            await self._send()
+
+    async def _send(self):
+        try:
+            await self.send()
+            self.sent += 1
+        except Exception as err:
+            logging.error(f"Caught exception while sending a sync: {err}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            if not self.pending:
+                continue
+            started = loop.time()
+            self.pending = False
+            await self._send()
+            await asyncio.sleep(max(0.0, 1 / self.rate - (loop.time() - started)))
+
+    def start(self):
+        if self._task is None:
+            self._event = asyncio.Event()
+            if self.pending:
+                self._event.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._event = None
+        if self.pending:
+            self.dropped += 1
+            self.pending = False
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Awaitable, Callable
+
+
+class Priority(IntEnum):
+    CONTROL = 0  # channel joins, heartbeats
+    CHAT = 1
+    POSE = 2  # avatar updates
+
+
+DEFAULT_HIGH_WATER = {Priority.CONTROL: 256, Priority.CHAT: 64, Priority.POSE: 4}
+
+
+@dataclass
+class SendStats:
+    count: int = 0  # number of sent messages
+    failed: int = 0  # number of messages failed to be sent
+    total_latency: float = 0  # total time from enqueueing to sending, seconds
+    max_latency: float = 0
+    max_depth: int = 0  # the biggest observed queue depth
+    waits: int = 0  # number of times a sender waited for the queue to drain below the high-water mark
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.count if self.count > 0 else 0
+
+
+class SendQueue:
+    def __init__(self, send: Callable[[str], Awaitable], high_water: dict[Priority, int] | None = None):
+        """Outbound message queue served by a single writer task.
+
+        Messages of higher priority are always sent first, messages of the same priority are sent in order.
+        When a priority's queue reaches its high-water mark, :meth:`put` waits until the writer drains it.
+
+        :param send: Coroutine function writing a message to the socket
+        :param high_water: Per-priority queue limits, defaults to ``DEFAULT_HIGH_WATER``
+        """
+        self.send = send
+        self.high_water = {**DEFAULT_HIGH_WATER, **(high_water or {})}
+        self.stats = {p: SendStats() for p in Priority}
+        self._queues = {p: deque() for p in sorted(Priority)}
+        self._space = {p: asyncio.Event() for p in Priority}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def depth(self, priority: Priority | None = None) -> int:
+        """Number of queued messages of the priority, or of all priorities if it is not given."""
+        if priority is None:
+            return sum(map(len, self._queues.values()))
+        return len(self._queues[priority])
+
+    async def put(self, data: str, priority: Priority = Priority.CONTROL) -> asyncio.Future:
+        """Enqueue a message.
+
+        :param data: The message
+        :param priority: Priority of the message
+        :return: Future, which is set to True when the message is sent, or to False if sending failed
+        """
+        queue, stats = self._queues[priority], self.stats[priority]
+        while len(queue) >= self.high_water[priority]:
+            stats.waits += 1
+            self._space[priority].clear()
+            await self._space[priority].wait()
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        queue.append((data, loop.time(), fut))
+        stats.max_depth = max(stats.max_depth, len(queue))
+        self._wakeup.set()
+        return fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            priority = next((p for p, q in self._queues.items() if len(q) > 0), None)
+            if priority is None:
+                self._wakeup.clear()
+                continue
+
+            data, enqueued, fut = self._queues[priority].popleft()
+            self._space[priority].set()
+            stats = self.stats[priority]
+            try:
+                await self.send(data)
+            except asyncio.CancelledError:
+                fut.set_result(False)
+                raise
+            except Exception as err:
+                logging.error(f"Caught exception while sending a message: {err}")
+                stats.failed += 1
+                fut.set_result(False)
+                continue
+
+            latency = loop.time() - enqueued
+            stats.count += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            fut.set_result(True)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer. Messages which were not sent yet are discarded."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for priority, queue in self._queues.items():
+            while len(queue) > 0:
+                _, _, fut = queue.popleft()
+                fut.set_result(False)
+            self._space[priority].set()
@@ -1,75 +1,143 @@
-from dataclasses import KW_ONLY, Field, dataclass, field
-from functools import wraps
+from dataclasses import dataclass, field, fields
+from itertools import chain
 from uuid import uuid4
 from base64 import urlsafe_b64encode as b64encode
 
+import asyncio
+import random
+
+import numpy as np
+
 
 def gen_uuid():
     return b64encode(uuid4().bytes).decode("utf-8").strip("=")
 
 
+def coerce(typ, val):
+    """Convert the value to the type, if it is not an instance of the type yet.
+
+    Dicts are passed as keyword arguments, lists, tuples and arrays as positional arguments.
+    """
+    if isinstance(val, typ):
+        return val
+    if isinstance(val, dict):
+        return typ(**val)
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return typ(*val)
+    return typ(val)
+
+
+def _add_slots(cls):
+    # ``dataclass(slots=True)`` of Python 3.10 duplicates the slots of base classes and fails on fields overridden
+    # by properties (e.g. ``Avatar.components``), so the slotted class is created here.
+    inherited = set(chain.from_iterable(getattr(base, "__slots__", ()) for base in cls.__mro__[1:-1]))
+    names = tuple(f.name for f in fields(cls) if not isinstance(cls.__dict__.get(f.name), property))
+    cls_dict = dict(cls.__dict__)
+    for name in names:
+        # defaults are kept by ``__init__``, class attributes would shadow the slots
+        cls_dict.pop(name, None)
+    names = tuple(name for name in names if name not in inherited)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = names
+    new = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new.__qualname__ = cls.__qualname__
+
+    # zero-argument ``super()`` in methods refers to the class through the ``__class__`` cell
+    for member in cls_dict.values():
+        funcs = (member.fget, member.fset, member.fdel) if isinstance(member, property) else (member,)
+        for func in funcs:
+            for cell in getattr(func, "__closure__", None) or ():
+                if cell.cell_contents is cls:
+                    cell.cell_contents = new
+    return new
+
+
 def typed_dataclass(cls):
-    cls = dataclass(cls)
-
-    @wraps(cls, updated=())
-    class _wrap(cls):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            for field in cls.__dataclass_fields__.values():
-                if not hasattr(self.__class__, field.name):
-                    if not isinstance(getattr(self, field.name), field.type) and not isinstance(
-                        getattr(self, field.name), Field
-                    ):
-                        self.__setattr__(field.name, getattr(self, field.name))
-
-        def __setattr__(self, name, val):
-            if name in cls.__dataclass_fields__:
-                typ = cls.__dataclass_fields__[name].type
-                if not isinstance(val, typ):
-                    if isinstance(val, dict):
-                        val = typ(**val)
-                    elif isinstance(val, list) or isinstance(val, tuple):
-                        val = typ(*val)
-                    else:
-                        val = typ(val)
-            super().__setattr__(name, val)
-
-    return _wrap
+    """Slotted dataclass, which converts field values to the annotated types on construction.
+
+    Plain assignments are not checked, use :meth:`assign` to set values which may need a conversion
+    (e.g. dicts received from the network).
+    """
+
+    def __post_init__(self):
+        for name, typ in type(self).__typed_fields__:
+            val = getattr(self, name)
+            if not isinstance(val, typ):
+                setattr(self, name, coerce(typ, val))
+
+    def assign(self, **values):
+        types = type(self).__field_types__
+        for name, val in values.items():
+            setattr(self, name, coerce(types[name], val))
+
+    cls.__post_init__ = __post_init__
+    cls.assign = assign
+    cls = _add_slots(dataclass(cls))
+    cls.__field_types__ = {f.name: f.type for f in fields(cls)}
+    cls.__typed_fields__ = tuple(
+        (f.name, f.type) for f in fields(cls) if not isinstance(getattr(cls, f.name, None), property)
+    )
+    return cls
 
 
 def indexable(cls):
-    if not hasattr(cls, "__slots__"):
-        if hasattr(cls, "__dataclass_fields__"):
-            cls.__slots__ = tuple(cls.__dataclass_fields__.keys())
-        else:
-            cls = dataclass(cls, slots=True)
-
-    @wraps(cls, updated=())
-    class _wrap(cls):
-        def __getitem__(self, ix):
-            if isinstance(ix, int):
-                return self.__getattribute__(list(self.__slots__)[ix])
-            elif ix in self.__slots__:
-                return self.__getattribute__(ix)
-            else:
-                return super().__getitem__(ix)
-
-        def __setitem__(self, ix, val):
-            if isinstance(ix, int):
-                self.__setattr__(list(self.__slots__)[ix], val)
-            elif ix in self.__slots__:
-                self.__setattr__(ix, val)
-            else:
-                super().__setitem__(ix, val)
-
-        def __iter__(self):
-            for k in self.__slots__:
-                yield self.__getattribute__(k)
-
-        def __len__(self):
-            return len(self.__slots__)
-
-    return _wrap
+    """Allow access to the dataclass fields by index and iteration over them."""
+    names = tuple(f.name for f in fields(cls)) if hasattr(cls, "__dataclass_fields__") else tuple(cls.__slots__)
+    index = {name: name for name in names}
+    index.update(enumerate(names))
+    index.update((i - len(names), name) for i, name in enumerate(names))
+
+    def __getitem__(self, ix):
+        try:
+            return getattr(self, index[ix])
+        except (KeyError, TypeError):
+            raise IndexError(ix) from None
+
+    def __setitem__(self, ix, val):
+        try:
+            setattr(self, index[ix], val)
+        except (KeyError, TypeError):
+            raise IndexError(ix) from None
+
+    def __iter__(self):
+        for name in names:
+            yield getattr(self, name)
+
+    def __len__(self):
+        return len(names)
+
+    cls.__getitem__ = __getitem__
+    cls.__setitem__ = __setitem__
+    cls.__iter__ = __iter__
+    cls.__len__ = __len__
+    return cls
+
+
+@dataclass
+class Backoff:
+    """Exponential backoff of reconnection attempts."""
+
+    initial: float = 0.5  # delay before the first retry, seconds
+    factor: float = 2
+    maximum: float = 30
+    jitter: float = 0.1  # relative random deviation of the delay
+    attempt: int = 0
+
+    def next_delay(self) -> float:
+        try:
+            delay = min(self.maximum, self.initial * self.factor**self.attempt)
+        except OverflowError:
+            # a long outage, the delay is at the maximum for a long time
+            delay = self.maximum
+        self.attempt += 1
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def wait(self):
+        await asyncio.sleep(self.next_delay())
+
+    def reset(self):
+        self.attempt = 0
 
 
 def throw(exc=Exception):
@@ -78,27 +146,102 @@ def throw(exc=Exception):
     raise exc
 
 
-@indexable
-@typed_dataclass
-class Vector3:
-    x: float = 0
-    y: float = 0
-    z: float = 0
-    _: KW_ONLY
-    isVector3: bool = True
+class _ArrayVector:
+    """Three floats stored in a NumPy array.
+
+    ``np.asarray(v)`` and ``v.array`` return the underlying array without copying, so changes made through the array
+    are visible in the vector.
+    """
+
+    __slots__ = ("array",)
+
+    def __init__(self, x: float = 0, y: float = 0, z: float = 0):
+        self.array = np.array((x, y, z), dtype=float)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, copy: bool = True):
+        """Create a vector from an array of three floats.
+
+        :param array: The array
+        :param copy: If False, the vector is a view of the array (which must be a float64 array then)
+        """
+        obj = cls.__new__(cls)
+        obj.array = np.array(array, dtype=float) if copy else array
+        return obj
+
+    x = property(lambda self: float(self.array[0]), lambda self, v: self.array.__setitem__(0, v))
+    y = property(lambda self: float(self.array[1]), lambda self, v: self.array.__setitem__(1, v))
+    z = property(lambda self: float(self.array[2]), lambda self, v: self.array.__setitem__(2, v))
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None and not copy:
+            return self.array
+        return np.array(self.array, dtype=dtype, copy=True)
+
+    def __getitem__(self, ix):
+        if isinstance(ix, str):
+            ix = "xyz".index(ix)
+        return float(self.array[ix])
+
+    def __setitem__(self, ix, val):
+        if isinstance(ix, str):
+            ix = "xyz".index(ix)
+        self.array[ix] = val
+
+    def __iter__(self):
+        return iter(self.array.tolist())
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        if not isinstance(other, _ArrayVector):
+            return NotImplemented
+        return type(self) is type(other) and bool((self.array == other.array).all())
+
+    def __repr__(self):
+        x, y, z = self.array.tolist()
+        return f"{type(self).__name__}(x={x}, y={y}, z={z})"
+
+
+class Vector3(_ArrayVector):
+    __slots__ = ()
+
+    def __init__(self, x: float = 0, y: float = 0, z: float = 0, *, isVector3: bool = True):
+        super().__init__(x, y, z)
+
+    isVector3 = True
 
     def to_obj(self):
-        return {"isVector3": True, "x": self.x, "y": self.y, "z": self.z}
+        x, y, z = self.array.tolist()
+        return {"isVector3": True, "x": x, "y": y, "z": z}
 
 
-@indexable
-@typed_dataclass
-class Rotation:
-    x: float = 0
-    y: float = 0
-    z: float = 0
+class Rotation(_ArrayVector):
+    """Euler angles in degrees, as used by A-Frame."""
+
+    __slots__ = ()
 
     def to_obj(self):
-        return {"x": self.x, "y": self.y, "z": self.z}
+        x, y, z = self.array.tolist()
+        return {"x": x, "y": y, "z": z}
+
+
+def vectors_to_array(vectors) -> np.ndarray:
+    """Stack vectors (or rotations) into a Nx3 array.
+
+    :param vectors: Iterable of :class:`Vector3` or :class:`Rotation`
+    """
+    return np.stack([v.array for v in vectors])
+
+
+def array_to_vectors(array: np.ndarray, cls=Vector3) -> list:
+    """Split Nx3 float64 array into vectors, which are views of its rows.
+
+    :param array: The array
+    :param cls: :class:`Vector3` or :class:`Rotation`
+    """
+    return [cls.from_array(row, copy=False) for row in array]
+
 
 inf = float('inf')
@@ -1 +1,2 @@
-from .peer import Peer
\ No newline at end of file
+from .peer import Peer
+from .registry import PeerRegistry
\ No newline at end of file
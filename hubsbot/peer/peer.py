@@ -1,33 +1,60 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from math import cos, sin, radians
+from typing import Callable
+
 import numpy as np
-from transforms3d.affines import decompose44, compose
 
 
-def _get_updated_matrix(matrix: np.ndarray, components: dict, keys=('0', '1', '2')):
+def euler_to_matrix(x: float, y: float, z: float) -> np.ndarray:
+    """
+    Converts Hubs (A-Frame) rotation into the rotation matrix.
+    A-Frame uses Euler angles in degrees, applied in the 'YXZ' order.
+
+    :return: 3x3 rotation matrix
     """
-    Given initial matrix, updates it from components.
+    a, b = cos(radians(x)), sin(radians(x))
+    c, d = cos(radians(y)), sin(radians(y))
+    e, f = cos(radians(z)), sin(radians(z))
+    ce, cf, de, df = c * e, c * f, d * e, d * f
+    return np.array([
+        [ce + df * b, de * b - cf, a * d],
+        [a * f, a * e, -b],
+        [cf * b - de, df + ce * b, a * c]
+    ])
+
+
+def _update_matrix(matrix: np.ndarray, components: dict, keys=('0', '1', '2')):
+    """
+    Updates the affine matrix from components in-place.
+    Translation and scale are written directly, without decomposing the matrix.
     :param matrix: The matrix
     :param components: The dictionary of components
     :param keys: Tuple of exactly three keys, for translation, rotation and scale
-    :return:
     """
     k1, k2, k3 = keys
 
-    T, R, Z, S = decompose44(matrix)
-    if k1 in components and components[k1] is not None:
-        position = components[k1]
-        T = np.array([position['x'], position['y'], position['z']])
+    position = components.get(k1)
+    if position is not None:
+        matrix[:3, 3] = (position['x'], position['y'], position['z'])
+
+    rotation = components.get(k2)
+    scale = components.get(k3)
+    if rotation is None and scale is None:
+        return
 
-    if k2 in components and components[k2] is not None:
-        # Hubs use weird frame for the euler angles, which is not supported by transforms3d
-        # Of course it is still possible to find proper formulas, but I'll just leave it as a TODO.
-        pass
+    if scale is not None:
+        Z = (scale['x'], scale['y'], scale['z'])
+    else:
+        Z = np.linalg.norm(matrix[:3, :3], axis=0)
 
-    if k3 in components and components[k3] is not None:
-        scale = components[k3]
-        Z = np.array([scale['x'], scale['y'], scale['z']])
+    if rotation is not None:
+        R = euler_to_matrix(rotation['x'], rotation['y'], rotation['z'])
+    else:
+        # columns of the upper-left block are the rotation axes multiplied by scale
+        norms = np.linalg.norm(matrix[:3, :3], axis=0)
+        R = matrix[:3, :3] / np.where(norms > 0, norms, 1)
 
-    return compose(T, R, Z, S)
+    matrix[:3, :3] = R * Z
 
 
 @dataclass
@@ -39,6 +66,7 @@ class Peer:
     display_name: str # display name of the peer
     matrix: np.ndarray # 4x4 affine object matrix. Position vector is matrix[:, :-1].
     head_matrix: np.ndarray # 4x4 affine matrix. Represents "head" transfomation of the object. It is updated with nafr.
+    on_moved: Callable[['Peer'], None] | None = field(default=None, repr=False, compare=False) # called when position is updated
     # TODO: avatar description (head, hands position, skin, mesh, etc...) to be here
 
     def update_from_naf(self, data: dict):
@@ -47,8 +75,11 @@ class Peer:
         (idk what this abbreviation means, there is no docs on the Hubs protocol).
         """
         components = data['components']
-        self.matrix = _get_updated_matrix(self.matrix, components, ('0', '1', '2'))
-        self.head_matrix = _get_updated_matrix(self.head_matrix, components, ('5', '6', '9999'))
+        # matrices are updated in-place, as they may be views into :class:`PeerRegistry` arrays
+        _update_matrix(self.matrix, components, ('0', '1', '2'))
+        _update_matrix(self.head_matrix, components, ('5', '6', '9999'))
+        if self.on_moved is not None and components.get('0') is not None:
+            self.on_moved(self)
 
     def update_from_nafr_um(self, data: dict):
         """
@@ -0,0 +1,210 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .peer import Peer
+from .spatial import UniformGrid
+
+
+class PeerRegistry(MutableMapping):
+    def __init__(self, capacity: int = 64, cell_size: float = 2.0):
+        """
+        Dict-like collection of the room peers (``id -> Peer``), which keeps pose matrices of all peers
+        in contiguous Nx4x4 arrays, so the room can be queried with a single NumPy call.
+
+        Each peer occupies a slot of the arrays, and ``Peer.matrix``/``Peer.head_matrix`` are views into its slot.
+        Slots of the left peers are reused by the new ones.
+        Positions are also kept in a spatial index, which is updated whenever a peer moves.
+
+        :param capacity: Initial number of slots. The arrays grow automatically.
+        :param cell_size: Cell size of the spatial index, meters
+        """
+        self.matrices = np.tile(np.eye(4), (capacity, 1, 1))
+        self.head_matrices = np.tile(np.eye(4), (capacity, 1, 1))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.ids = np.empty(capacity, dtype=object)
+        self.slots: Dict[str, int] = {}
+        self._peers: Dict[str, Peer] = {}
+        self._free: List[int] = list(reversed(range(capacity)))
+        self.index = UniformGrid(cell_size)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.active)
+
+    def add(self, id: str, display_name: str) -> Peer:
+        """
+        Adds a new peer with identity pose. If the peer is already present, only its display name is updated.
+
+        :return: The peer
+        """
+        if id in self._peers:
+            peer = self._peers[id]
+            peer.display_name = display_name
+            return peer
+
+        if len(self._free) == 0:
+            self._grow()
+        slot = self._free.pop()
+        self.matrices[slot] = np.eye(4)
+        self.head_matrices[slot] = np.eye(4)
+        self.active[slot] = True
+        self.ids[slot] = id
+        self.slots[id] = slot
+
+        peer = Peer(id=id, display_name=display_name, matrix=self.matrices[slot], head_matrix=self.head_matrices[slot],
+                    on_moved=self._on_peer_moved)
+        self._peers[id] = peer
+        self.index.update(slot, self.matrices[slot, :3, 3])
+        return peer
+
+    def remove(self, id: str) -> Peer:
+        """
+        Removes the peer and frees its slot. The removed peer keeps a copy of its last pose.
+
+        :return: The removed peer
+        """
+        peer = self._peers.pop(id)
+        slot = self.slots.pop(id)
+        self.active[slot] = False
+        self.ids[slot] = None
+        self._free.append(slot)
+        self.index.remove(slot)
+
+        peer.on_moved = None
+        peer.matrix = peer.matrix.copy()
+        peer.head_matrix = peer.head_matrix.copy()
+        return peer
+
+    def _grow(self):
+        old = self.capacity
+        new = old * 2
+        self.matrices = np.concatenate([self.matrices, np.tile(np.eye(4), (new - old, 1, 1))])
+        self.head_matrices = np.concatenate([self.head_matrices, np.tile(np.eye(4), (new - old, 1, 1))])
+        self.active = np.concatenate([self.active, np.zeros(new - old, dtype=bool)])
+        self.ids = np.concatenate([self.ids, np.empty(new - old, dtype=object)])
+        self._free.extend(reversed(range(old, new)))
+
+        # the old views point to the old arrays
+        for id, peer in self._peers.items():
+            slot = self.slots[id]
+            peer.matrix = self.matrices[slot]
+            peer.head_matrix = self.head_matrices[slot]
+
+    def __getitem__(self, id: str) -> Peer:
+        return self._peers[id]
+
+    def __setitem__(self, id: str, peer: Peer):
+        """
+        Adds the peer created outside of the registry, copying its pose into the registry arrays.
+        """
+        if id in self._peers:
+            self.remove(id)
+        new = self.add(id, peer.display_name)
+        new.matrix[...] = peer.matrix
+        new.head_matrix[...] = peer.head_matrix
+        self._on_peer_moved(new)
+
+    def _on_peer_moved(self, peer: Peer):
+        slot = self.slots[peer.id]
+        self.index.update(slot, self.matrices[slot, :3, 3])
+
+    def __delitem__(self, id: str):
+        self.remove(id)
+
+    def __iter__(self):
+        return iter(self._peers)
+
+    def __len__(self):
+        return len(self._peers)
+
+    def __contains__(self, id):
+        return id in self._peers
+
+    # ---
+    # Vectorized queries. All of them return ids of the peers along with the computed values.
+
+    def _slots(self, exclude: Iterable[str] = ()) -> np.ndarray:
+        mask = self.active.copy()
+        for id in exclude:
+            slot = self.slots.get(id)
+            if slot is not None:
+                mask[slot] = False
+        return np.flatnonzero(mask)
+
+    def positions(self, exclude: Iterable[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param exclude: Ids of the peers to skip (e.g. the bot itself)
+        :return: Array of ids and Nx3 array of the peers positions
+        """
+        slots = self._slots(exclude)
+        return self.ids[slots], self.matrices[slots, :3, 3]
+
+    def centroid(self, exclude: Iterable[str] = ()) -> np.ndarray:
+        """
+        :param exclude: Ids of the peers to skip (e.g. the bot itself)
+        :return: Mean position of the peers
+        """
+        return self.positions(exclude)[1].mean(axis=0)
+
+    def distances(self, point: np.ndarray, exclude: Iterable[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param point: The point to measure distances from
+        :param exclude: Ids of the peers to skip
+        :return: Array of ids and array of the distances from the point to the peers
+        """
+        ids, positions = self.positions(exclude)
+        return ids, np.linalg.norm(positions - np.asarray(point)[:3], axis=1)
+
+    def head_poses(self, exclude: Iterable[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: Array of ids and Nx4x4 array of the world head matrices of the peers
+        """
+        slots = self._slots(exclude)
+        return self.ids[slots], self.matrices[slots] @ self.head_matrices[slots]
+
+    def facing(self, fov: float = 60, exclude: Iterable[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds who is looking at whom.
+
+        :param fov: Field of view of a peer, degrees
+        :param exclude: Ids of the peers to skip
+        :return: Array of ids and NxN boolean matrix, where ``[i, j]`` is true if the peer ``i`` faces the peer ``j``
+        """
+        ids, heads = self.head_poses(exclude)
+        positions = heads[:, :3, 3]
+        # Hubs (three.js) objects look along -Z
+        forward = -heads[:, :3, 2]
+        forward /= np.maximum(np.linalg.norm(forward, axis=1, keepdims=True), 1e-9)
+
+        d = positions[None, :, :] - positions[:, None, :]
+        dist = np.maximum(np.linalg.norm(d, axis=2), 1e-9)
+        cos = np.einsum('ik,ijk->ij', forward, d) / dist
+        res = cos >= np.cos(np.deg2rad(fov) / 2)
+        np.fill_diagonal(res, False)
+        return ids, res
+
+    # ---
+    # Proximity queries backed by the spatial index
+
+    def peers_within(self, radius: float, point: np.ndarray, exclude: Iterable[str] = ()) -> List[Peer]:
+        """
+        :param radius: The radius, meters
+        :param point: Center of the search
+        :param exclude: Ids of the peers to skip
+        :return: Peers within the radius from the point, sorted by distance
+        """
+        slots, _ = self.index.within(self.matrices[:, :3, 3], point, radius)
+        return [self._peers[id] for id in self.ids[slots] if id not in exclude]
+
+    def nearest_peers(self, k: int, point: np.ndarray, exclude: Iterable[str] = ()) -> List[Peer]:
+        """
+        :param k: Number of peers
+        :param point: Center of the search
+        :param exclude: Ids of the peers to skip
+        :return: Up to ``k`` peers nearest to the point, sorted by distance
+        """
+        exclude = set(exclude)
+        slots, _ = self.index.nearest(self.matrices[:, :3, 3], point, k + len(exclude))
+        return [self._peers[id] for id in self.ids[slots] if id not in exclude][:k]
@@ -0,0 +1,100 @@
+from math import floor
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+
+class UniformGrid:
+    def __init__(self, cell_size: float = 2.0):
+        """
+        Uniform grid spatial index. Items (integers, e.g. :class:`PeerRegistry` slots) are bucketed by the cell
+        containing their position, so proximity queries only look at the cells around the query point.
+
+        :param cell_size: Size of the cubic cell, meters
+        """
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int, int], Set[int]] = {}
+        self.keys: Dict[int, Tuple[int, int, int]] = {}
+
+    def _key(self, position) -> Tuple[int, int, int]:
+        cs = self.cell_size
+        return floor(position[0] / cs), floor(position[1] / cs), floor(position[2] / cs)
+
+    def update(self, item: int, position):
+        """
+        Inserts the item or moves it to the new position.
+        """
+        key = self._key(position)
+        old = self.keys.get(item)
+        if old == key:
+            return
+        if old is not None:
+            self._discard(item, old)
+        self.keys[item] = key
+        self.cells.setdefault(key, set()).add(item)
+
+    def remove(self, item: int):
+        key = self.keys.pop(item, None)
+        if key is not None:
+            self._discard(item, key)
+
+    def _discard(self, item: int, key):
+        cell = self.cells[key]
+        cell.discard(item)
+        if len(cell) == 0:
+            del self.cells[key]
+
+    def candidates(self, point, radius: float) -> List[int]:
+        """
+        Items from the cells intersecting the cube of the given half-size around the point.
+        It is a superset of the items within the radius.
+        """
+        lo = self._key((point[0] - radius, point[1] - radius, point[2] - radius))
+        hi = self._key((point[0] + radius, point[1] + radius, point[2] + radius))
+        n_cells = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+
+        res = []
+        if n_cells > len(self.cells):
+            # the box is huge compared to the occupied area
+            for key, cell in self.cells.items():
+                if lo[0] <= key[0] <= hi[0] and lo[1] <= key[1] <= hi[1] and lo[2] <= key[2] <= hi[2]:
+                    res.extend(cell)
+        else:
+            for i in range(lo[0], hi[0] + 1):
+                for j in range(lo[1], hi[1] + 1):
+                    for k in range(lo[2], hi[2] + 1):
+                        cell = self.cells.get((i, j, k))
+                        if cell is not None:
+                            res.extend(cell)
+        return res
+
+    def within(self, positions: np.ndarray, point, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param positions: Array of positions, indexed by items
+        :return: Items within the radius from the point and distances to them, sorted by distance
+        """
+        items = np.fromiter(self.candidates(point, radius), dtype=int)
+        dist = np.linalg.norm(positions[items] - np.asarray(point)[:3], axis=1)
+        mask = dist <= radius
+        items, dist = items[mask], dist[mask]
+        order = np.argsort(dist)
+        return items[order], dist[order]
+
+    def nearest(self, positions: np.ndarray, point, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param positions: Array of positions, indexed by items
+        :return: Up to ``k`` items nearest to the point and distances to them, sorted by distance
+        """
+        point = np.asarray(point)[:3]
+        radius = self.cell_size
+        while True:
+            items = np.fromiter(self.candidates(point, radius), dtype=int)
+            if len(items) >= k or len(items) == len(self.keys):
+                dist = np.linalg.norm(positions[items] - point, axis=1)
+                order = np.argsort(dist)[:k]
+                # everything closer than ``radius`` is guaranteed to be found
+                if len(order) == 0 or dist[order[-1]] <= radius or len(items) == len(self.keys):
+                    return items[order], dist[order]
+                radius = dist[order[-1]]
+            else:
+                radius *= 2
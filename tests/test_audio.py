@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from av import AudioFrame
+
+from hubsbot.consumer.processed import audio
+from hubsbot.consumer.processed.audio import PolyphaseResampler, frames_to_pcm16, resample, to_mono_int16
+
+RATES = [(48000, 16000), (44100, 16000), (8000, 16000), (16000, 16000)]
+
+
+def signal(length: int, rate: int, seed: int = 0) -> np.ndarray:
+    t = np.arange(length) / rate
+    x = 8000 * np.sin(2 * np.pi * 440 * t) + np.random.default_rng(seed).normal(0, 300, length)
+    return x.astype(np.int16)
+
+
+def frame(samples: np.ndarray, rate: int = 48000, format: str = 's16', layout: str = 'mono') -> AudioFrame:
+    f = AudioFrame.from_ndarray(samples.reshape(1, -1), format=format, layout=layout)
+    f.sample_rate = rate
+    return f
+
+
+@pytest.mark.parametrize('src,dst', RATES)
+def test_chunked_resampling_matches_whole(src, dst):
+    x = signal(src // 5, src)
+    whole = PolyphaseResampler(src, dst)
+    expected = np.concatenate([whole.process(x), whole.flush()])
+
+    chunked = PolyphaseResampler(src, dst)
+    sizes = np.random.default_rng(1).integers(1, 700, 100)
+    bounds = np.cumsum(np.concatenate(([0], sizes)))
+    parts = [chunked.process(x[a:b]) for a, b in zip(bounds[:-1], bounds[1:]) if a < len(x)]
+    result = np.concatenate(parts + [chunked.flush()])
+
+    assert len(result) == len(expected)
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+@pytest.mark.parametrize('src,dst', RATES)
+def test_flush_emits_delayed_tail(src, dst):
+    x = signal(src // 10, src)
+    resampler = PolyphaseResampler(src, dst)
+    out = np.concatenate([resampler.process(x), resampler.flush()])
+    delay = resampler.delay // resampler.down
+
+    # the output is the whole signal delayed by the half of the filter
+    assert len(out) >= delay + len(x) * dst // src
+    # and it matches a reference implementation after the delay
+    reference = resample(x, src, dst)
+    tail = out[delay:delay + len(reference)].astype(int)
+    inner = slice(50, len(reference) - 50)
+    assert np.abs(tail[inner] - reference[inner]).max() < 0.02 * 8000
+
+    # the state is reset for the next stream
+    assert np.array_equal(resampler.process(x[:100]), PolyphaseResampler(src, dst).process(x[:100]))
+
+
+@pytest.mark.parametrize('src,dst', RATES)
+def test_resample_without_scipy(monkeypatch, src, dst):
+    x = signal(src // 10, src)
+    reference = resample(x, src, dst).astype(int)
+    monkeypatch.setattr(audio, 'resample_poly', None)
+    result = resample(x, src, dst).astype(int)
+
+    assert len(result) == len(reference)
+    # the filters differ, so the edges of the signal differ more
+    inner = slice(50, len(reference) - 50)
+    assert np.abs(result[inner] - reference[inner]).max() < 0.02 * 8000
+    assert np.abs(result - reference).max() < 0.1 * 8000
+
+
+@pytest.mark.parametrize('dtype,scale', [(np.int16, 1), (np.int32, 1 << 16), (np.float32, 1 / 32768)])
+def test_to_mono_int16(dtype, scale):
+    left = np.array([1000, -2000, 30000], dtype=np.float64)
+    right = np.array([3000, -4000, 30000], dtype=np.float64)
+    samples = (np.stack([left, right], axis=1) * scale).astype(dtype)
+    assert np.array_equal(to_mono_int16(samples), [2000, -3000, 30000])
+
+
+def test_frames_to_pcm16():
+    frames = [frame(np.full(480, 100, dtype=np.int16)), frame(np.full(480, 200, dtype=np.int16))]
+    pcm = frames_to_pcm16(frames, pad=0.01)
+    assert pcm.dtype == np.int16
+    assert len(pcm) == 480 + 960 + 480
+    assert pcm[:480].max() == 0 and pcm[-480:].max() == 0
+    assert np.array_equal(pcm[480:960], np.full(480, 100))
+
+    assert len(frames_to_pcm16(frames, 16000)) == 320
+    assert len(frames_to_pcm16([], 16000, pad=0.1)) == 3200
+
+
+def test_stereo_planar_frames():
+    planar = np.stack([np.full(4, 0.5), np.zeros(4)]).astype(np.float32)
+    f = AudioFrame.from_ndarray(planar, format='fltp', layout='stereo')
+    f.sample_rate = 48000
+    assert np.array_equal(frames_to_pcm16([f]), np.full(4, 8192))
@@ -0,0 +1,70 @@
+import copy
+
+from hubsbot.hubsclient.avatar import Avatar, HandPose
+from hubsbot.hubsclient.naf import NAF
+from hubsbot.hubsclient.utils import Vector3
+
+
+def test_first_sync_sends_everything():
+    avatar = Avatar()
+    assert avatar.to_obj()['isFirstSync']
+    assert avatar.to_um_obj() is None
+    assert not avatar.to_obj()['isFirstSync']
+
+
+def test_only_changed_components_are_sent():
+    avatar = Avatar()
+    avatar.to_obj()
+
+    avatar.position.x = 1
+    avatar.righthand.pose = HandPose.point
+    um = avatar.to_um_obj()
+    assert set(um['components']) == {'0', '4'}
+    assert um['components']['0']['x'] == 1
+    assert um['components']['4']['right_hand_pose'] == HandPose.point.value
+    assert avatar.to_um_obj() is None
+
+
+def test_patched_components_match_rebuilt_ones():
+    avatar = Avatar()
+    avatar.components
+    avatar.position = Vector3(1, 2, 3)
+    avatar.head_transform.rotation.y = 90
+    avatar.lefthand.visible = True
+    avatar.muted = False
+
+    assert avatar.components == Avatar._build_components(avatar)
+    assert avatar.dirty == set(range(13))  # nothing was sent yet
+    avatar.mark_sent(avatar.components)
+    assert avatar.dirty == set()
+
+
+def test_components_set_from_naf():
+    source = Avatar(position=Vector3(1, 2, 3), muted=False)
+    components = copy.deepcopy(source.components)
+    avatar = Avatar()
+    avatar.components = components
+
+    assert avatar.position == Vector3(1, 2, 3)
+    assert not avatar.muted
+    assert avatar.components == components
+
+
+def test_naf_changes_are_relative_to_sent_copy():
+    naf = NAF(components=[{'x': 0}, {'x': 0}])
+    sent = naf.to_obj()['components']
+    # the sent list is the live one, changing it must not move the baseline
+    sent[1]['x'] = 1
+
+    assert naf.changed_components() == {'1': {'x': 1}}
+    assert naf.to_um_obj()['components'] == {'1': {'x': 1}}
+    assert naf.to_um_obj() is None
+
+
+def test_avatar_sync_does_not_copy_components():
+    avatar = Avatar()
+    avatar.to_obj()
+    # the dirty set is the baseline of the avatar, the cached list is not snapshotted
+    assert avatar.sent_components is avatar.components_cache
+    avatar.position.y = 1
+    assert set(avatar.changed_components()) == {'0'}
@@ -0,0 +1,25 @@
+import pytest
+
+from hubsbot.hubsclient.utils import Backoff
+
+
+def test_delays_grow_within_jitter_and_maximum():
+    backoff = Backoff(initial=0.5, factor=2, maximum=30, jitter=0.1)
+    for attempt in range(20):
+        base = min(30, 0.5 * 2 ** attempt)
+        assert base * 0.9 <= backoff.next_delay() <= base * 1.1
+    assert backoff.attempt == 20
+
+
+def test_no_jitter_and_reset():
+    backoff = Backoff(initial=1, factor=3, maximum=5, jitter=0)
+    assert [backoff.next_delay() for _ in range(4)] == [1, 3, 5, 5]
+    backoff.reset()
+    assert backoff.next_delay() == 1
+
+
+@pytest.mark.parametrize('attempts', [100, 2000])
+def test_many_attempts_stay_at_maximum(attempts):
+    backoff = Backoff(maximum=30, jitter=0)
+    backoff.attempt = attempts
+    assert backoff.next_delay() == 30
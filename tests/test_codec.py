@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from hubsbot.hubsclient import codec
+from hubsbot.hubsclient.client import MSG
+from hubsbot.hubsclient.naf import NAF
+
+
+@pytest.fixture(params=list(codec.codecs))
+def codec_name(request):
+    previous = codec.get_codec()
+    codec.set_codec(request.param)
+    yield request.param
+    codec.set_codec(previous)
+
+
+def test_round_trip(codec_name):
+    c = codec.get_codec()
+    obj = {'a': [1, 2.5, None, True], 'b': {'c': 'строка'}}
+    assert c.loads(c.dumps(obj)) == obj
+    assert isinstance(c.dumps(obj), str)
+
+
+def test_numpy_and_naf_objects(codec_name):
+    c = codec.get_codec()
+    naf = NAF(network_id='id', owner_id='owner', components=[{'x': 1}])
+    data = c.loads(c.dumps({'v': np.float64(0.5), 'arr': np.arange(3), 'naf': naf}))
+    assert data['v'] == 0.5
+    assert data['arr'] == [0, 1, 2]
+    assert data['naf']['networkId'] == 'id'
+    assert data['naf']['components'] == [{'x': 1}]
+
+
+def test_msg_round_trip(codec_name):
+    msg = MSG(2, 3, 'hub:room', 'naf', {'from_session_id': 'sid'})
+    parsed = MSG.from_json(msg.to_json())
+    assert (parsed.target, parsed.cmd, parsed.data) == ('hub:room', 'naf', {'from_session_id': 'sid'})
+    assert (parsed.channel, parsed.id) == ('2', '3')
+
+
+def test_nested_naf_is_parsed_lazily(codec_name):
+    msg = MSG.from_json(codec.get_codec().dumps([None, None, 'hub', 'nafr', {'naf': '{"dataType": "um"}'}]))
+    assert msg.naf == {'dataType': 'um'}
+    assert msg.naf is msg.naf
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.set_codec('yaml')
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from hubsbot.bot.consumers import ConsumerEntry, ConsumerRegistry
+
+
+def entry(id, peer_id, kind='audio'):
+    return ConsumerEntry(peer_id, kind, SimpleNamespace(id=id))
+
+
+def test_index_by_peer():
+    registry = ConsumerRegistry()
+    registry.add(entry('1', 'a'))
+    registry.add(entry('2', 'a', 'video'))
+    registry.add(entry('3', 'b'))
+    registry.add(entry('4', None, 'data'))
+
+    assert [e.id for e in registry.get('a')] == ['1', '2']
+    assert [e.id for e in registry.get('a', 'video')] == ['2']
+    assert registry.get('c') == []
+    assert set(registry.peers()) == {'a', 'b', None}
+    assert len(registry) == 4 and '3' in registry
+
+
+def test_pop():
+    registry = ConsumerRegistry()
+    registry.add(entry('1', 'a'))
+    registry.add(entry('2', 'a'))
+
+    assert registry.pop('1').id == '1'
+    assert registry.pop('1') is None
+    assert registry.peers() == ['a']
+    registry.pop('2')
+    assert registry.peers() == []
+
+
+def test_pop_peer_and_clear():
+    registry = ConsumerRegistry()
+    registry.add(entry('1', 'a'))
+    registry.add(entry('2', 'a'))
+    registry.add(entry('3', 'b'))
+
+    assert sorted(e.id for e in registry.pop_peer('a')) == ['1', '2']
+    assert registry.pop_peer('a') == []
+    assert '1' not in registry
+    assert [e.id for e in registry.clear()] == ['3']
+    assert len(registry) == 0 and registry.peers() == []
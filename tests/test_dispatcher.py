@@ -0,0 +1,57 @@
+import asyncio
+
+from hubsbot.bot.dispatcher import EventDispatcher
+
+
+def test_handlers_are_called_in_registration_order():
+    dispatcher = EventDispatcher()
+    calls = []
+
+    async def second(msg):
+        calls.append(('second', msg))
+
+    dispatcher.register('naf', lambda msg: calls.append(('first', msg)))
+    dispatcher.register('naf', second)
+    asyncio.run(dispatcher.dispatch('naf', 1))
+
+    assert calls == [('first', 1), ('second', 1)]
+    assert dispatcher.stats['naf'].count == 1
+
+
+def test_failing_handler_does_not_stop_others():
+    dispatcher = EventDispatcher()
+    calls = []
+
+    def fail(msg):
+        raise ValueError(msg)
+
+    dispatcher.register('message', fail)
+    dispatcher.register('message', calls.append)
+    asyncio.run(dispatcher.dispatch('message', 'hi'))
+
+    assert calls == ['hi']
+
+
+def test_unhandled_and_unregister():
+    dispatcher = EventDispatcher()
+    dispatcher.register('naf', print)
+    dispatcher.unregister('naf', print)
+    asyncio.run(dispatcher.dispatch('naf', None))
+
+    assert 'naf' not in dispatcher.handlers
+    assert dispatcher.unhandled == 1
+
+
+def test_batch_stats():
+    dispatcher = EventDispatcher()
+    received = []
+    dispatcher.register('naf', received.append)
+    asyncio.run(dispatcher.dispatch_batch([('naf', i) for i in range(3)], backlog=5))
+    asyncio.run(dispatcher.dispatch_batch([('naf', 3)], backlog=0))
+
+    assert received == [0, 1, 2, 3]
+    assert dispatcher.batches == 2
+    assert dispatcher.last_batch == 1
+    assert dispatcher.max_batch == 3
+    assert dispatcher.backlog == 0
+    assert dispatcher.max_backlog == 5
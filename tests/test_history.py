@@ -0,0 +1,60 @@
+from hubsbot.hubsclient.client import MSG
+from hubsbot.hubsclient.history import MessageHistory
+
+
+def msg(cmd, i):
+    return MSG(cmd=cmd, data={'i': i})
+
+
+def test_event_buffers_are_bounded_separately():
+    history = MessageHistory(capacity=2)
+    for i in range(5):
+        history.append(msg('message', i))
+    history.append(msg('presence_diff', 5))
+
+    assert [m.data['i'] for m in history.iter('message')] == [3, 4]
+    assert [m.data['i'] for m in history] == [3, 4, 5]
+    assert len(history) == 3
+
+
+def test_naf_is_not_kept_by_default():
+    history = MessageHistory()
+    history.append(msg('naf', 0))
+    history.append(msg('nafr', 1))
+
+    assert len(history) == 0
+    assert history.dropped == 2
+
+
+def test_recent_keeps_arrival_order():
+    history = MessageHistory()
+    for i, cmd in enumerate(['message', 'presence_diff', 'message', 'presence_diff', 'message']):
+        history.append(msg(cmd, i))
+
+    assert [m.data['i'] for m in history.recent(3)] == [2, 3, 4]
+    assert [m.data['i'] for m in history.recent(2, cmd='message')] == [2, 4]
+    assert [m.data['i'] for m in history.recent(10, predicate=lambda m: m.data['i'] % 2 == 1)] == [1, 3]
+
+
+def test_set_retention():
+    history = MessageHistory(capacity=4)
+    for i in range(4):
+        history.append(msg('message', i))
+    history.set_retention('message', 2)
+    assert [m.data['i'] for m in history] == [2, 3]
+
+    history.set_retention('message', 0)
+    history.append(msg('message', 4))
+    assert len(history) == 0
+
+
+def test_memory_usage_counts_messages():
+    small, big = MessageHistory(), MessageHistory()
+    for i in range(10):
+        small.append(MSG(cmd='message', data={'body': 'x'}))
+        big.append(MSG(cmd='message', data={'body': 'x' * 10000}))
+
+    assert big.memory_usage() > 10 * 10000
+    assert big.memory_usage() - small.memory_usage() >= 10 * 9999
+    big.clear()
+    assert big.memory_usage() == 0
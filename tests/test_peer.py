@@ -0,0 +1,86 @@
+from math import cos, radians, sin
+
+import numpy as np
+import pytest
+
+from hubsbot.peer import Peer
+from hubsbot.peer.peer import euler_to_matrix
+
+
+def rx(deg):
+    a = radians(deg)
+    return np.array([[1, 0, 0], [0, cos(a), -sin(a)], [0, sin(a), cos(a)]])
+
+
+def ry(deg):
+    a = radians(deg)
+    return np.array([[cos(a), 0, sin(a)], [0, 1, 0], [-sin(a), 0, cos(a)]])
+
+
+def rz(deg):
+    a = radians(deg)
+    return np.array([[cos(a), -sin(a), 0], [sin(a), cos(a), 0], [0, 0, 1]])
+
+
+def vec(x, y, z):
+    return {'x': x, 'y': y, 'z': z}
+
+
+@pytest.fixture
+def peer():
+    moves = []
+    peer = Peer(id='a', display_name='Alice', matrix=np.eye(4), head_matrix=np.eye(4), on_moved=moves.append)
+    peer.moves = moves
+    return peer
+
+
+@pytest.mark.parametrize('angles', [(0, 0, 0), (30, 0, 0), (0, 45, 0), (0, 0, 60), (10, -70, 135)])
+def test_euler_is_yxz(angles):
+    x, y, z = angles
+    assert np.allclose(euler_to_matrix(x, y, z), ry(y) @ rx(x) @ rz(z))
+
+
+def test_rotation_only_keeps_position_and_scale(peer):
+    peer.matrix[:3, 3] = (1, 2, 3)
+    peer.matrix[:3, :3] = np.diag([2, 2, 2])
+    matrix = peer.matrix
+    peer.update_from_naf({'components': {'1': vec(0, 90, 0)}})
+
+    assert peer.matrix is matrix  # updated in place
+    assert np.allclose(peer.matrix[:3, :3], ry(90) * 2)
+    assert np.array_equal(peer.matrix[:3, 3], [1, 2, 3])
+    # only position changes are reported
+    assert peer.moves == []
+
+
+def test_scale_only_keeps_rotation(peer):
+    peer.update_from_naf({'components': {'1': vec(20, 30, 40)}})
+    peer.update_from_naf({'components': {'2': vec(1, 2, 3)}})
+    assert np.allclose(peer.matrix[:3, :3], euler_to_matrix(20, 30, 40) * (1, 2, 3))
+
+    peer.update_from_naf({'components': {'2': vec(0.5, 0.5, 0.5)}})
+    assert np.allclose(peer.matrix[:3, :3], euler_to_matrix(20, 30, 40) * 0.5)
+
+
+def test_rotation_and_scale_with_position(peer):
+    peer.update_from_naf({'components': {'0': vec(4, 5, 6), '1': vec(0, 0, 90), '2': vec(3, 1, 1)}})
+    assert np.allclose(peer.matrix[:3, :3], rz(90) * (3, 1, 1))
+    assert np.array_equal(peer.matrix[:3, 3], [4, 5, 6])
+    assert peer.moves == [peer]
+
+    # rotation keeps the previous scale
+    peer.update_from_naf({'components': {'1': vec(0, 0, 0)}})
+    assert np.allclose(peer.matrix[:3, :3], np.diag([3, 1, 1]))
+
+
+def test_head_components(peer):
+    peer.update_from_naf({'components': {'5': vec(0, 1.6, 0), '6': vec(-15, 0, 0)}})
+    assert np.array_equal(peer.head_matrix[:3, 3], [0, 1.6, 0])
+    assert np.allclose(peer.head_matrix[:3, :3], rx(-15))
+    assert np.array_equal(peer.matrix, np.eye(4))
+
+
+def test_nafr_um(peer):
+    peer.update_from_nafr_um({'d': [{'components': {'0': vec(1, 0, 0)}}]})
+    peer.update_from_nafr_um({'d': []})
+    assert peer.matrix[0, 3] == 1
@@ -0,0 +1,85 @@
+import asyncio
+
+import numpy as np
+from aiortc.mediastreams import MediaStreamError
+from av import AudioFrame
+
+from hubsbot.consumer.processed.phrases_consumer import PhrasesVoiceConsumer
+
+RATE = 16000
+FRAME = 1000  # 1/16 s, so the durations add up exactly
+
+
+class FakeTrack:
+    def __init__(self, loudness: list):
+        """Mono frames, loud ones are filled with a constant."""
+        self.frames = []
+        for i, loud in enumerate(loudness):
+            frame = AudioFrame.from_ndarray(np.full((1, FRAME), 1000 if loud else 0, dtype=np.int16), layout='mono')
+            frame.sample_rate = RATE
+            frame.pts = i
+            self.frames.append(frame)
+
+    async def recv(self):
+        if len(self.frames) == 0:
+            raise MediaStreamError
+        return self.frames.pop(0)
+
+
+class RecordingConsumer(PhrasesVoiceConsumer):
+    def __init__(self, loudness: list):
+        super().__init__(FakeTrack(loudness), pre_roll=0.25, hangover=0.125, max_phrase_length=1.0,
+                         vad=lambda frame: bool(frame.to_ndarray().any()))
+        self.phrases = []
+        self.begins = 0
+        self.streamed = []
+
+    async def on_phrase_begin(self):
+        self.begins += 1
+        self.streamed.append([])
+
+    async def on_phrase_frame(self, frame: AudioFrame):
+        self.streamed[-1].append(frame.pts)
+
+    async def on_phrase(self, frames):
+        # the state is handed over, the next phrase starts from scratch
+        assert self.frames == []
+        assert len(self._pre_roll_frames) == 0
+        self.phrases.append([f.pts for f in frames])
+
+
+def run(loudness: list) -> RecordingConsumer:
+    consumer = RecordingConsumer(loudness)
+    asyncio.run(consumer.start())
+    return consumer
+
+
+def test_pre_roll_and_hangover():
+    consumer = run([0] * 10 + [1] * 5 + [0] * 5)
+    # 4 frames of the pre-roll, the speech and 2 frames of the hangover
+    assert consumer.phrases == [list(range(6, 17))]
+    assert consumer.streamed == consumer.phrases
+    assert consumer.frames == []
+
+
+def test_short_pause_does_not_end_phrase():
+    consumer = run([0] * 4 + [1] * 3 + [0] + [1] * 3 + [0] * 2)
+    assert consumer.phrases == [list(range(13))]
+
+
+def test_long_phrase_is_split():
+    consumer = run([0] * 3 + [1] * 20 + [0] * 2)
+    # the pre-roll counts towards the maximal length: 3 + 13 frames make a second
+    assert consumer.phrases == [list(range(16)), list(range(16, 25))]
+    assert consumer.begins == 2
+
+
+def test_phrase_is_emitted_at_track_end():
+    consumer = run([1] * 3)
+    assert consumer.phrases == [[0, 1, 2]]
+
+
+def test_silence_only():
+    consumer = run([0] * 30)
+    assert consumer.phrases == []
+    assert len(consumer._pre_roll_frames) == 4
@@ -0,0 +1,114 @@
+import asyncio
+import os
+
+import pytest
+
+from hubsbot.consumer.processed.ring import RingReader, RingRef
+from hubsbot.consumer.processed.vosk import pool as pool_module
+from hubsbot.consumer.processed.vosk import VoskPool
+
+
+def fake_worker(conn, lang, model_path):
+    """Echoes the samples back instead of recognizing them, exits on b'die'."""
+    if lang == 'missing':
+        conn.send({'error': 'no model'})
+        return
+    conn.send('ready')
+    reader = RingReader()
+    streams = {}
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            reader.close()
+            break
+        if msg[0] == 'end':
+            conn.send({'text': ' '.join(streams.pop(msg[1], []))})
+            continue
+        pcm = msg[-1]
+        if isinstance(pcm, RingRef):
+            with reader.view(pcm) as view:
+                pcm = bytes(view)
+        if pcm == b'die':
+            os._exit(1)
+        if msg[0] == 'phrase':
+            conn.send({'text': pcm.decode()})
+        else:
+            streams.setdefault(msg[1], []).append(pcm.decode())
+            conn.send({'partial': ' '.join(streams[msg[1]])})
+
+
+@pytest.fixture(autouse=True)
+def fake_vosk(monkeypatch):
+    # workers are forked, so they run the patched function
+    monkeypatch.setattr(pool_module, 'vosk_worker', fake_worker)
+
+
+def run(coro_fn, **kwargs):
+    async def main():
+        pool = VoskPool(**kwargs)
+        try:
+            return await coro_fn(pool)
+        finally:
+            await pool.close()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('ring_size', [0, 64])
+def test_phrases_of_a_source_are_recognized_in_order(ring_size):
+    async def main(pool):
+        jobs = [pool.recognize(key, f'{key}{i}'.encode(), 16000) for i in range(5) for key in 'ab']
+        texts = [r['text'] for r in await asyncio.gather(*jobs)]
+        assert all(ring.pending == 0 for ring in pool._rings.values())
+        return texts, pool
+
+    texts, pool = run(main, workers=2, ring_size=ring_size)
+    assert texts == [f'{key}{i}' for i in range(5) for key in 'ab']
+    assert pool.stats.completed == 10
+
+
+def test_stream():
+    async def main(pool):
+        stream = pool.open_stream(16000)
+        partials = [(await stream.feed(chunk))['partial'] for chunk in (b'one', b'two')]
+        return partials, await stream.finish()
+
+    partials, final = run(main, workers=2)
+    assert partials == ['one', 'one two']
+    assert final == {'text': 'one two'}
+
+
+def test_dead_worker_is_respawned():
+    async def main(pool):
+        with pytest.raises(RuntimeError):
+            await pool.recognize('a', b'die', 16000)
+        return await pool.recognize('a', b'alive', 16000), pool
+
+    res, pool = run(main, workers=1)
+    assert res == {'text': 'alive'}
+    # the job killed the first worker and its respawned replacement
+    assert pool.stats.restarts == 2
+    assert pool.stats.failed == 1
+
+
+def test_worker_without_model_is_retired():
+    async def main(pool):
+        with pytest.raises(RuntimeError):
+            await pool.recognize('a', b'x', 16000)
+        with pytest.raises(RuntimeError):
+            pool.open_stream(16000)
+
+    run(main, workers=2, lang='missing')
+
+
+def test_cancelled_job_is_skipped():
+    async def main(pool):
+        first = asyncio.ensure_future(pool.recognize('a', b'first', 16000))
+        second = asyncio.ensure_future(pool.recognize('a', b'second', 16000))
+        await asyncio.sleep(0)
+        second.cancel()
+        await first
+        await asyncio.sleep(0.1)
+        assert pool._rings['a'].pending == 0
+        return pool
+
+    assert run(main, workers=1).stats.completed == 1
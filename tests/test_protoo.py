@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+
+from hubsbot.bot.protoo import LatencyHistogram, ProtooClient, ProtooError
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.client: ProtooClient | None = None
+        self.replies = {}  # method -> response fields
+
+    async def send(self, data: str):
+        msg = json.loads(data)
+        self.sent.append(msg)
+        reply = self.replies.get(msg.get('method'))
+        if reply is not None:
+            # responses may come out of order
+            asyncio.get_running_loop().call_later(reply.pop('delay', 0), self.client.handle_response,
+                                                  {'response': True, 'id': msg['id'], **reply})
+
+
+def client_with(replies: dict, timeout: float = 1) -> ProtooClient:
+    socket = FakeSocket()
+    socket.replies = replies
+    socket.client = ProtooClient(socket, timeout=timeout)
+    return socket.client
+
+
+def test_concurrent_requests_are_matched_by_id():
+    async def main():
+        client = client_with({
+            'slow': {'ok': True, 'data': {'v': 'slow'}, 'delay': 0.02},
+            'fast': {'ok': True, 'data': {'v': 'fast'}},
+        })
+        return await asyncio.gather(client.request('slow'), client.request('fast')), client
+
+    (slow, fast), client = asyncio.run(main())
+    assert (slow, fast) == ({'v': 'slow'}, {'v': 'fast'})
+    assert client.in_flight == 0
+    assert client.latency['slow'].count == 1
+
+
+def test_error_and_timeout():
+    async def main():
+        client = client_with({'bad': {'ok': False, 'errorCode': 500, 'errorReason': 'nope'}}, timeout=0.01)
+        with pytest.raises(ProtooError) as err:
+            await client.request('bad')
+        assert err.value.code == 500
+        with pytest.raises(TimeoutError):
+            await client.request('silent')
+        assert client.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_responses_to_server_requests():
+    async def main():
+        client = client_with({})
+        await client.respond(7)
+        await client.reject(8, 500, 'failed')
+        return client.socket.sent
+
+    sent = asyncio.run(main())
+    assert sent[0] == {'response': True, 'id': 7, 'ok': True, 'data': {}}
+    assert sent[1] == {'response': True, 'id': 8, 'ok': False, 'errorCode': 500, 'errorReason': 'failed'}
+
+
+def test_close_cancels_pending():
+    async def main():
+        client = client_with({})
+        task = asyncio.create_task(client.request('never'))
+        await asyncio.sleep(0)
+        client.close()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for seconds in [0.001] * 98 + [0.3, 20]:
+        histogram.add(seconds)
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.99) == 0.5
+    assert histogram.quantile(1) == float('inf')
+    assert histogram.max == 20
@@ -0,0 +1,204 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from hubsbot.bot import bot as bot_module
+from hubsbot.bot.bot import Bot
+from hubsbot.bot.consumers import ConsumerEntry, ConsumerRegistry
+from hubsbot.hubsclient import client as client_module
+from hubsbot.hubsclient.client import HubsClient, MSG
+from hubsbot.hubsclient.utils import Backoff
+from hubsbot.peer import PeerRegistry
+
+
+class FakeHubsSocket:
+    def __init__(self, sid: str):
+        """Answers the join commands and records everything else."""
+        self.sid = sid
+        self.sent = []
+        self.aborted = False
+        self.transport = SimpleNamespace(abort=self.abort)
+        self._incoming = asyncio.Queue()
+
+    def abort(self):
+        self.aborted = True
+
+    async def send(self, data: str):
+        msg = json.loads(data)
+        self.sent.append(msg)
+        if msg[3] == 'phx_join':
+            response = {'session_id': self.sid} if msg[2] == 'ret' else {}
+            self._incoming.put_nowait(MSG(None, None, msg[2], 'phx_reply', {'response': response}).to_json())
+
+    async def recv(self):
+        return await self._incoming.get()
+
+    async def close(self):
+        pass
+
+    def sent_cmds(self, cmd: str) -> list:
+        return [msg for msg in self.sent if msg[3] == cmd]
+
+
+class FakeServer(list):
+    def __init__(self):
+        """Sockets created by the client. A connection attempt waits until ``allow`` is set."""
+        super().__init__()
+        self.allow = asyncio.Event()
+        self.allow.set()
+
+    async def connect(self, url: str) -> FakeHubsSocket:
+        await self.allow.wait()
+        socket = FakeHubsSocket(f'sid{len(self)}')
+        self.append(socket)
+        return socket
+
+
+@pytest.fixture
+def sockets(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(client_module, 'ws_connect', server.connect)
+    return server
+
+
+def test_sync_while_reconnecting_is_dropped(sockets):
+    async def main():
+        client = HubsClient('example.org', 'room', 'avatar', sync_rate=None)
+        await client.join()
+        assert client.sid == 'sid0'
+
+        sockets.allow.clear()
+        reconnect = asyncio.create_task(client.reconnect())
+        await asyncio.sleep(0.01)
+        # the socket is gone until the connection is established again
+        assert client.sock is None and not client.joined
+        client.avatar.position.x = 1
+        assert await client.sync() is None
+        assert await client.send_chat('hello') is None
+
+        sockets.allow.set()
+        await reconnect
+        await client.sync()
+        await client.close()
+        return client
+
+    client = asyncio.run(main())
+    old, new = sockets
+    assert client.sid is None
+    assert old.sent_cmds('message') == []
+    # the full state is sent on the rejoin, with the change made while reconnecting
+    naf = new.sent_cmds('naf')
+    assert len(naf) == 1
+    assert naf[0][4]['data']['isFirstSync']
+    assert naf[0][4]['data']['components'][0]['x'] == 1
+
+
+def test_heartbeat_timeout_aborts_socket(sockets):
+    async def main():
+        client = HubsClient('example.org', 'room', 'avatar', heartbeat_interval=0.01, heartbeat_timeout=0.05)
+        await client.join()
+        await asyncio.sleep(0.03)
+        assert not sockets[0].aborted
+        assert len(sockets[0].sent_cmds('heartbeat')) > 0
+        await asyncio.sleep(0.1)
+        await client.close()
+
+    asyncio.run(main())
+    assert sockets[0].aborted
+
+
+class FakeClient:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.reconnects = 0
+        self.sid = 'old'
+        self.avatar = SimpleNamespace(is_first_sync=False)
+
+    async def reconnect(self):
+        self.reconnects += 1
+        if self.reconnects <= self.failures:
+            raise OSError('unreachable')
+        self.sid = 'new'
+
+
+class FakeConsumer:
+    def __init__(self, id: str):
+        self.id = id
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def make_bot(hubs_client) -> Bot:
+    bot = Bot.__new__(Bot)
+    bot.hubs_client = hubs_client
+    bot.peers = PeerRegistry()
+    bot.consumers = ConsumerRegistry()
+    bot.text_consumers = {}
+    bot.voice_peer_id = 'old'
+    bot._tasks = []
+    bot._closing = False
+    bot.hubs_reconnects = 0
+    bot.media_reconnects = 0
+    return bot
+
+
+def test_hubs_reconnect_keeps_media(monkeypatch):
+    monkeypatch.setattr(bot_module, 'Backoff', lambda: Backoff(initial=0, jitter=0))
+
+    async def main():
+        bot = make_bot(FakeClient(failures=2))
+        media = []
+        monkeypatch.setattr(bot, '_reconnect_media', lambda: media.append(1))
+        await bot._reconnect_hubs()
+        return bot, media
+
+    bot, media = asyncio.run(main())
+    assert bot.hubs_client.reconnects == 3
+    assert bot.hubs_reconnects == 1
+    # the mediasoup peer id stays valid with the new Hubs session id
+    assert media == [] and bot.voice_peer_id == 'old'
+
+
+def test_reconnect_is_not_counted_when_closing(monkeypatch):
+    monkeypatch.setattr(bot_module, 'Backoff', lambda: Backoff(initial=0, jitter=0))
+
+    async def main():
+        bot = make_bot(FakeClient(failures=10))
+
+        async def close_soon():
+            await asyncio.sleep(0)
+            bot._closing = True
+
+        await asyncio.gather(bot._reconnect_hubs(), close_soon())
+        return bot
+
+    assert asyncio.run(main()).hubs_reconnects == 0
+
+
+def test_presence_state_resyncs_peers_and_consumers():
+    async def main():
+        bot = make_bot(FakeClient(failures=0))
+        for id in ('a', 'b'):
+            bot.peers.add(id, id)
+            bot.text_consumers[id] = object()
+        consumers = {id: FakeConsumer(id) for id in ('a', 'b', 'c')}
+        for id, consumer in consumers.items():
+            bot.consumers.add(ConsumerEntry(id, 'audio', consumer))
+        bot.consumers.add(ConsumerEntry(None, 'data', FakeConsumer('data')))
+
+        metas = {'metas': [{'profile': {'displayName': 'x'}}]}
+        bot._on_presence_state(MSG(cmd='presence_state', data={'a': metas, 'new': metas}))
+        await asyncio.gather(*bot._tasks)
+        return bot, consumers
+
+    bot, consumers = asyncio.run(main())
+    assert set(bot.peers) == {'a', 'new'}
+    assert set(bot.text_consumers) == {'a'}
+    # consumers of the peers which are gone are closed, the others and the data consumer are kept
+    assert [c.closed for c in consumers.values()] == [False, True, True]
+    assert set(bot.consumers.peers()) == {'a', None}
+    assert bot.hubs_client.avatar.is_first_sync
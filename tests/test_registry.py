@@ -0,0 +1,69 @@
+import numpy as np
+
+from hubsbot.peer import Peer, PeerRegistry
+
+
+def move(peer, x, y=0.0, z=0.0):
+    peer.update_from_naf({'components': {'0': {'x': x, 'y': y, 'z': z}}})
+
+
+def test_peer_matrices_are_views_of_the_registry():
+    registry = PeerRegistry(capacity=2)
+    peer = registry.add('a', 'Alice')
+    move(peer, 1, 2, 3)
+
+    slot = registry.slots['a']
+    assert np.array_equal(registry.matrices[slot, :3, 3], [1, 2, 3])
+    assert registry.add('a', 'Alicia') is peer
+    assert peer.display_name == 'Alicia'
+
+
+def test_growth_keeps_poses():
+    registry = PeerRegistry(capacity=1)
+    peers = [registry.add(str(i), str(i)) for i in range(5)]
+    for i, peer in enumerate(peers):
+        move(peer, i)
+
+    assert registry.capacity >= 5
+    for i, peer in enumerate(peers):
+        assert peer.matrix[0, 3] == i
+        assert registry.matrices[registry.slots[str(i)], 0, 3] == i
+
+
+def test_removed_peer_keeps_pose_and_frees_slot():
+    registry = PeerRegistry(capacity=1)
+    peer = registry.add('a', 'Alice')
+    move(peer, 5)
+    removed = registry.pop('a')
+
+    assert removed is peer
+    assert peer.matrix[0, 3] == 5
+    assert 'a' not in registry
+    registry.add('b', 'Bob')
+    assert registry.capacity == 1
+    assert peer.matrix[0, 3] == 5
+
+
+def test_setitem_copies_pose():
+    registry = PeerRegistry()
+    outside = Peer(id='a', display_name='Alice', matrix=np.eye(4), head_matrix=np.eye(4))
+    outside.matrix[:3, 3] = (4, 0, 0)
+    registry['a'] = outside
+
+    assert registry['a'] is not outside
+    assert registry.peers_within(1, np.array([4, 0, 0])) == [registry['a']]
+
+
+def test_proximity_queries():
+    registry = PeerRegistry(cell_size=1.0)
+    for i, x in enumerate([0, 1.5, 3, 10]):
+        move(registry.add(str(i), str(i)), x)
+
+    assert [p.id for p in registry.peers_within(2, np.zeros(3))] == ['0', '1']
+    assert [p.id for p in registry.peers_within(2, np.zeros(3), exclude=['0'])] == ['1']
+    assert [p.id for p in registry.nearest_peers(2, np.array([9.0, 0, 0]))] == ['3', '2']
+    assert [p.id for p in registry.nearest_peers(1, np.array([9.0, 0, 0]), exclude=['3'])] == ['2']
+
+    # the index follows the moves
+    move(registry['3'], 0.5)
+    assert [p.id for p in registry.peers_within(1, np.zeros(3))] == ['0', '3']
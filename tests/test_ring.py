@@ -0,0 +1,92 @@
+import pytest
+
+from hubsbot.consumer.processed.ring import RingReader, SharedRingBuffer
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRingBuffer(16)
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def reader():
+    reader = RingReader()
+    yield reader
+    reader.close()
+
+
+def read(reader, ref) -> bytes:
+    with reader.view(ref) as view:
+        return bytes(view)
+
+
+def test_write_and_read(ring, reader):
+    ref = ring.write(b'hello')
+    assert (ref.offset, ref.length) == (0, 5)
+    assert read(reader, ref) == b'hello'
+    assert ring.free == 11 and ring.pending == 1
+
+    ring.release(ref)
+    assert ring.free == 16 and ring.pending == 0
+
+
+def test_wraparound_skips_tail(ring, reader):
+    a, b = ring.write(b'a' * 8), ring.write(b'b' * 4)
+    ring.release(a)
+    # 4 bytes left in the tail, the chunk is written at the beginning
+    c = ring.write(b'c' * 5)
+    assert c.offset == 0
+    assert read(reader, c) == b'c' * 5
+    assert read(reader, b) == b'b' * 4
+    assert ring.free == 3
+
+    # the skipped tail is reclaimed along with the chunk
+    ring.release(b)
+    assert ring.free == 7
+    ring.release(c)
+    assert ring.free == 16
+
+
+def test_empty_ring_takes_full_chunk(ring, reader):
+    ring.release(ring.write(b'a' * 10))
+    ref = ring.write(b'b' * 16)
+    assert ref.offset == 0
+    assert read(reader, ref) == b'b' * 16
+
+
+def test_full_ring(ring):
+    a = ring.write(b'a' * 8)
+    ring.write(b'b' * 8)
+    assert ring.write(b'c') is None
+    ring.release(a)
+    assert ring.write(b'c' * 8) is not None
+    assert ring.write(b'd') is None
+
+
+def test_out_of_order_release(ring, reader):
+    a, b, c = ring.write(b'aaaa'), ring.write(b'bbbb'), ring.write(b'cccc')
+    ring.release(b)
+    # space is reclaimed in the order of writing
+    assert ring.free == 4
+    assert read(reader, c) == b'cccc'
+    ring.release(a)
+    assert ring.free == 12
+    ring.release(c)
+    assert ring.free == 16 and ring.pending == 0
+
+
+def test_reader_unmaps_least_recently_used():
+    rings = [SharedRingBuffer(8) for _ in range(3)]
+    reader = RingReader(max_open=2)
+    try:
+        refs = [r.write(bytes([i]) * 4) for i, r in enumerate(rings)]
+        for i, ref in enumerate(refs):
+            assert read(reader, ref) == bytes([i]) * 4
+        assert list(reader._open) == [rings[1].name, rings[2].name]
+        assert read(reader, refs[0]) == b'\x00' * 4
+    finally:
+        reader.close()
+        for r in rings:
+            r.close()
@@ -0,0 +1,68 @@
+import asyncio
+
+from hubsbot.hubsclient.scheduler import SyncScheduler
+
+
+def test_requests_are_coalesced_and_rate_limited():
+    async def main():
+        sent = []
+
+        async def send():
+            sent.append(state)
+
+        scheduler = SyncScheduler(send, rate=20)
+        scheduler.start()
+        state = 0
+        for state in range(5):
+            scheduler.request()
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return scheduler, sent
+
+    scheduler, sent = asyncio.run(main())
+    # the first request is sent right away, the rest are merged into a single sync of the latest state
+    assert sent == [0, 4]
+    assert scheduler.requested == 5
+    assert scheduler.sent == 2
+    assert scheduler.coalesced == 3
+    assert scheduler.dropped == 3
+
+
+def test_flush_and_stop():
+    async def main():
+        sent = []
+
+        async def send():
+            sent.append(1)
+
+        scheduler = SyncScheduler(send, rate=1)
+        scheduler.request()
+        await scheduler.flush()
+        await scheduler.flush()
+
+        scheduler.start()
+        scheduler.request()
+        await asyncio.sleep(0.01)
+        scheduler.request()  # waits for the next tick
+        await scheduler.stop()
+        return scheduler, sent
+
+    scheduler, sent = asyncio.run(main())
+    assert sent == [1, 1]
+    assert scheduler.dropped == 1
+    assert not scheduler.pending
+    assert scheduler.requested == scheduler.sent + scheduler.dropped
+
+
+def test_failed_send_is_not_counted():
+    async def main():
+        async def send():
+            raise ConnectionError()
+
+        scheduler = SyncScheduler(send)
+        scheduler.request()
+        await scheduler.flush()
+        return scheduler
+
+    assert asyncio.run(main()).sent == 0
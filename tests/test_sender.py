@@ -0,0 +1,64 @@
+import asyncio
+
+from hubsbot.hubsclient.sender import Priority, SendQueue
+
+
+def test_higher_priority_is_sent_first():
+    async def main():
+        sent = []
+
+        async def send(data):
+            sent.append(data)
+
+        queue = SendQueue(send)
+        futures = [await queue.put('pose', Priority.POSE), await queue.put('chat', Priority.CHAT),
+                   await queue.put('join', Priority.CONTROL), await queue.put('join2', Priority.CONTROL)]
+        queue.start()
+        results = await asyncio.gather(*futures)
+        await queue.stop()
+        return queue, sent, results
+
+    queue, sent, results = asyncio.run(main())
+    assert sent == ['join', 'join2', 'chat', 'pose']
+    assert results == [True] * 4
+    assert queue.stats[Priority.CONTROL].count == 2
+    assert queue.stats[Priority.CONTROL].max_depth == 2
+
+
+def test_put_waits_for_high_water():
+    async def main():
+        queue = SendQueue(lambda data: asyncio.sleep(0), high_water={Priority.POSE: 1})
+        await queue.put('a', Priority.POSE)
+        blocked = asyncio.create_task(queue.put('b', Priority.POSE))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        queue.start()
+        fut = await blocked
+        assert await fut
+        await queue.stop()
+        return queue
+
+    assert asyncio.run(main()).stats[Priority.POSE].waits == 1
+
+
+def test_failed_and_discarded_messages():
+    async def main():
+        async def send(data):
+            if data == 'bad':
+                raise ConnectionError()
+            await asyncio.sleep(10)
+
+        queue = SendQueue(send)
+        queue.start()
+        failed = await (await queue.put('bad'))
+        slow = await queue.put('slow')
+        queued = await queue.put('queued')
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        return queue, failed, await slow, await queued
+
+    queue, failed, slow, queued = asyncio.run(main())
+    assert (failed, slow, queued) == (False, False, False)
+    assert queue.stats[Priority.CONTROL].failed == 1
+    assert queue.depth() == 0
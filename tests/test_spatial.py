@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from hubsbot.peer.spatial import UniformGrid
+
+
+@pytest.fixture
+def points():
+    return np.random.default_rng(0).uniform(-20, 20, (200, 3))
+
+
+def grid_of(points, cell_size=2.0):
+    grid = UniformGrid(cell_size)
+    for i, p in enumerate(points):
+        grid.update(i, p)
+    return grid
+
+
+@pytest.mark.parametrize('radius', [0.5, 3, 50])
+def test_within_matches_brute_force(points, radius):
+    grid = grid_of(points)
+    center = np.array([1.0, -2.0, 0.5])
+    items, dist = grid.within(points, center, radius)
+
+    expected = np.linalg.norm(points - center, axis=1)
+    assert set(items) == set(np.flatnonzero(expected <= radius))
+    assert np.all(np.diff(dist) >= 0)
+    assert np.allclose(dist, expected[items])
+
+
+@pytest.mark.parametrize('k', [1, 5, 200, 300])
+def test_nearest_matches_brute_force(points, k):
+    grid = grid_of(points)
+    center = np.array([30.0, 0.0, 0.0])  # outside of the occupied area
+    items, dist = grid.nearest(points, center, k)
+
+    expected = np.sort(np.linalg.norm(points - center, axis=1))[:k]
+    assert np.allclose(dist, expected)
+
+
+def test_update_and_remove():
+    grid = UniformGrid(1.0)
+    positions = np.array([[0.5, 0.5, 0.5], [5.0, 5.0, 5.0]])
+    grid.update(0, positions[0])
+    grid.update(1, positions[1])
+
+    positions[1] = (0.6, 0.5, 0.5)
+    grid.update(1, positions[1])
+    assert sorted(grid.within(positions, (0.5, 0.5, 0.5), 0.2)[0]) == [0, 1]
+    assert len(grid.cells) == 1
+
+    grid.remove(0)
+    grid.remove(0)
+    assert list(grid.within(positions, (0.5, 0.5, 0.5), 0.2)[0]) == [1]
+
+
+def test_empty_grid():
+    grid = UniformGrid()
+    items, dist = grid.nearest(np.zeros((0, 3)), (0, 0, 0), 3)
+    assert len(items) == 0 and len(dist) == 0
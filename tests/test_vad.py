@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from av import AudioFrame
+
+from hubsbot.consumer.processed.vad import AmplitudeVAD, EnergyMeter, create_detector, detectors, frame_to_mono
+
+RATE = 48000
+
+
+def frame(samples: np.ndarray, layout: str = 'mono') -> AudioFrame:
+    f = AudioFrame.from_ndarray(samples.astype(np.int16).reshape(1, -1), format='s16', layout=layout)
+    f.sample_rate = RATE
+    return f
+
+
+def tone(amp: float, length: int = 960, freq: float = 300, start: int = 0) -> np.ndarray:
+    return amp * np.sin(2 * np.pi * freq * np.arange(start, start + length) / RATE)
+
+
+def noise(amp: float, length: int = 960, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, amp, length)
+
+
+def test_energy_meter_window():
+    meter = EnergyMeter(length=0.03, capacity=2)
+    for value in [100, 100, 100, 400]:
+        meter.add(np.full(480, value), 0.01)
+
+    # the window keeps the last three frames
+    assert len(meter) == 3
+    assert meter.calc() == pytest.approx(200)
+    assert meter.total_time == pytest.approx(0.03)
+
+
+def test_energy_meter_keeps_newest_frame():
+    meter = EnergyMeter(length=0.01)
+    meter.add(np.full(10, -5), 1.0)
+    assert len(meter) == 1
+    assert meter.calc() == 5
+
+
+def test_frame_to_mono():
+    interleaved = np.stack([np.full(4, 16384), np.zeros(4)], axis=1).reshape(-1)
+    assert np.allclose(frame_to_mono(frame(interleaved, 'stereo')), 0.25)
+
+
+def test_amplitude_vad():
+    vad = AmplitudeVAD(sliding_length=0.04, amp_threshold=200)
+    assert not vad(frame(tone(100)))
+    assert vad(frame(tone(5000)))
+
+
+@pytest.mark.parametrize('name', list(detectors))
+def test_detectors_separate_speech_from_silence(name):
+    vad = create_detector(name)
+    # adaptive detectors learn the noise floor first
+    assert not any(vad(frame(noise(30, seed=i))) for i in range(20))
+    speech = [vad(frame(tone(8000, start=i * 960) + noise(30, seed=20 + i))) for i in range(10)]
+    assert speech[-1]
+    silence = [vad(frame(noise(30, seed=30 + i))) for i in range(40)]
+    assert not silence[-1]
+
+
+def test_unknown_detector():
+    with pytest.raises(ValueError):
+        create_detector('neural')
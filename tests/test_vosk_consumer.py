@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from aiortc.mediastreams import MediaStreamError
+from av import AudioFrame
+
+from hubsbot.consumer.processed.audio import PolyphaseResampler
+from hubsbot.consumer.processed.ring import RingReader, RingRef
+from hubsbot.consumer.processed.vosk import pool as pool_module
+from hubsbot.consumer.processed.vosk import VoskPool, VoskVoiceConsumer
+
+RATE = 48000
+FRAME = 960
+
+
+def counting_worker(conn, lang, model_path):
+    """Reports the number of fed chunks as the partial and the number of samples as the final text."""
+    conn.send('ready')
+    reader = RingReader()
+    streams = {}
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            reader.close()
+            break
+        if msg[0] == 'end':
+            chunks, samples = streams.pop(msg[1], (0, 0))
+            conn.send({'text': str(samples)})
+            continue
+        pcm = msg[-1]
+        length = pcm.length if isinstance(pcm, RingRef) else len(pcm)
+        if msg[0] == 'phrase':
+            conn.send({'text': str(length // 2)})
+            continue
+        time.sleep(0.005)
+        chunks, samples = streams.get(msg[1], (0, 0))
+        streams[msg[1]] = (chunks + 1, samples + length // 2)
+        conn.send({'partial': str(chunks + 1)})
+
+
+@pytest.fixture(autouse=True)
+def fake_vosk(monkeypatch):
+    monkeypatch.setattr(pool_module, 'vosk_worker', counting_worker)
+
+
+class FakeTrack:
+    def __init__(self, loudness: list, endless: bool = False):
+        self.loudness = loudness
+        self.endless = endless
+        self.i = 0
+
+    async def recv(self):
+        await asyncio.sleep(0.001)
+        if self.i >= len(self.loudness):
+            if not self.endless:
+                raise MediaStreamError
+            await asyncio.sleep(3600)
+        amp = 1000 if self.loudness[self.i] else 0
+        samples = (amp * np.sin(np.arange(self.i * FRAME, (self.i + 1) * FRAME) / 10)).astype(np.int16)
+        frame = AudioFrame.from_ndarray(samples.reshape(1, -1), layout='mono')
+        frame.sample_rate = RATE
+        frame.pts = self.i
+        self.i += 1
+        return frame
+
+
+class RecordingConsumer(VoskVoiceConsumer):
+    def __init__(self, track, pool):
+        super().__init__(track, pool=pool, streaming=True, chunk_length=0.1, pre_roll=0.1, hangover=0.1,
+                         vad=lambda frame: bool(frame.to_ndarray().any()))
+        self.events = []
+
+    async def on_partial(self, msg):
+        self.events.append(('partial', int(msg.body)))
+
+    async def on_message(self, msg):
+        self.events.append(('final', int(msg.body)))
+
+
+def phrases(events: list) -> list:
+    res, current = [], []
+    for kind, value in events:
+        current.append(value)
+        if kind == 'final':
+            res.append(current)
+            current = []
+    assert current == [], 'partials are reported after the final text'
+    return res
+
+
+def expected_samples(phrase_frames: int) -> int:
+    # the whole phrase resampled at once, including the tail held back by the filter
+    resampler = PolyphaseResampler(RATE, 16000)
+    samples = np.zeros(phrase_frames * FRAME, dtype=np.int16)
+    return len(resampler.process(samples)) + len(resampler.flush())
+
+
+def test_streaming_partials_and_final():
+    loudness = [0] * 10 + [1] * 30 + [0] * 10 + [1] * 12 + [0] * 10
+
+    async def main():
+        pool = VoskPool(workers=1)
+        consumer = RecordingConsumer(FakeTrack(loudness), pool)
+        await consumer.start()
+        await pool.close()
+        return consumer
+
+    consumer = asyncio.run(main())
+    first, second = phrases(consumer.events)
+    # partials count the fed chunks, so they come in order
+    assert first[:-1] == list(range(1, len(first)))
+    assert second[:-1] == list(range(1, len(second)))
+    # 5 frames of the pre-roll, the speech and 5 frames of the hangover, fed along with the resampler tail
+    assert first[-1] == expected_samples(5 + 30 + 5)
+    assert second[-1] == expected_samples(5 + 12 + 5)
+
+
+def test_stream_is_aborted_when_consumer_stops_mid_phrase():
+    async def main():
+        pool = VoskPool(workers=1)
+        consumer = RecordingConsumer(FakeTrack([1] * 20, endless=True), pool)
+        task = asyncio.create_task(consumer.start())
+        await asyncio.sleep(0.3)
+        assert consumer._stream is not None
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert consumer._stream is None and consumer._partial is None
+        assert pool._stream_counts == [0]
+        # the worker is told to forget the stream
+        await asyncio.sleep(0.1)
+        assert pool.depth == 0
+        assert pool.stats.completed == pool.stats.submitted
+        assert pool._rings == {}
+        await pool.close()
+        return consumer
+
+    consumer = asyncio.run(main())
+    assert all(kind == 'partial' for kind, _ in consumer.events)